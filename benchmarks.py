@@ -0,0 +1,468 @@
+"""
+Vanilla Studio editor benchmarks.
+
+Times the editor's hot paths on synthetic files from 1k to 200k lines in every
+supported language, stores the results as a JSON baseline and fails when a path
+got slower than the baseline by more than a threshold.
+
+    python benchmarks.py --save                 # record a baseline
+    python benchmarks.py --threshold 25         # compare against it (exit 1 on regression)
+    python benchmarks.py --sizes 1000 --languages python,c
+
+Needs a display; on headless Linux it starts Xvfb itself (or use xvfb-run).
+"""
+import argparse
+import json
+import os
+import py_compile
+import random
+import shutil
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import main
+
+DEFAULT_SIZES = [1000, 10000, 50000, 200000]
+DEFAULT_BASELINE = Path(__file__).with_name("bench_baseline.json")
+LANGUAGES = ["python", "c", "c++", "html", "css", "javascript", "typescript", "rust",
+             "java", "lua", "go", "c#", "ruby", "kotlin", "nix"]
+
+# startup budgets (milliseconds) and modules that must not load before the first frame
+IMPORT_BUDGET_MS = 60
+FIRST_FRAME_BUDGET_MS = 500
+# worst time from a keystroke to the completion list, with COMPLETION_WORDS distinct identifiers indexed
+COMPLETION_BUDGET_MS = 5
+COMPLETION_WORDS = 300_000
+# worst quick-open keystroke (ms) over an index of SEARCH_PATHS files
+SEARCH_BUDGET_MS = 10
+SEARCH_PATHS = 100_000
+SEARCH_QUERIES = ["src3/lib", "main12.p", "pkg7main", "lib/main9", "mainpy", "zzz"]
+# per-call budgets (microseconds): a warm get_lexer() and one TOKEN_TAGS lookup
+LEXER_LOOKUP_BUDGET_US = 5
+TOKEN_TAG_BUDGET_US = 0.5
+DEFERRED_MODULES = ["pygments", "subprocess", "tempfile", "webbrowser", "logging",
+                    "multiprocessing", "concurrent.futures", "hashlib", "sqlite3"]
+HERE = Path(__file__).resolve().parent
+
+# ---------------------------
+# Setup helpers
+# ---------------------------
+def ensure_display():
+    """Start a private Xvfb when running headless on Linux. Returns the process (or None)."""
+    if sys.platform != "linux" or os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        sys.exit("No DISPLAY and Xvfb not found: install Xvfb or run under xvfb-run.")
+    display = ":97"
+    proc = subprocess.Popen([xvfb, display, "-screen", "0", "1280x1024x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    time.sleep(0.5)
+    return proc
+
+def synthetic_source(language, lines):
+    """`lines` lines of code in `language`, built by repeating the new-file sample."""
+    sample = main.EditorTab._sample_for_language(SimpleNamespace(language=language)) or "x = 1\n"
+    block = sample.rstrip("\n").split("\n")
+    reps = lines // len(block) + 1
+    return "\n".join((block * reps)[:lines]) + "\n"
+
+def pump(root, until, timeout=600):
+    """Run the Tk event loop until `until()` is true (background work lands via after())."""
+    deadline = time.perf_counter() + timeout
+    while not until():
+        root.update()
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark step did not finish")
+        time.sleep(0.0005)
+
+def timed(fn, repeat):
+    """Median wall time of `fn` (seconds) over `repeat` runs."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+def bench_language(app, root, language, size, repeat, workdir):
+    results = {}
+    source = synthetic_source(language, size)
+    ext = {k.lower(): v for k, v in main.LANG_EXT.items()}.get(language, ".txt")
+    path = Path(workdir) / f"bench_{size}{ext}"
+    path.write_text(source, encoding="utf-8")
+
+    tab = main.EditorTab(app.notebook, app, title=path.name, filepath=None, language=language)
+    app._add_tab(tab)
+    tab.text.delete("1.0", "end")
+    tab.text.insert("1.0", source)
+    root.update()
+
+    if main.USE_PYGMENTS:
+        def pygments_full():
+            # from scratch: no incremental state
+            tab._highlighter = None
+            tab.highlight_syntax()
+            pump(root, lambda: tab._highlight_poll_id is None)
+        results["highlight_syntax.pygments"] = timed(pygments_full, repeat)
+
+        def pygments_edit():
+            # the edit event schedules a highlight; run it now instead of after the delay
+            tab.text.insert(f"{size // 2}.0", "x = 'edit'\n")
+            tab.text.after_cancel(tab._highlight_after_id)
+            tab.highlight_syntax()
+            pump(root, lambda: tab._highlight_poll_id is None)
+        results["highlight_syntax.pygments_edit"] = timed(pygments_edit, repeat)
+
+    def basic():
+        # whole-buffer RegexScanner pass, as used without Pygments
+        for tag in main.SYNTAX_TAGS:
+            tab.text.tag_remove(tag, "1.0", "end")
+        tab._basic_highlight(tab.get_content())
+    results["highlight_syntax.basic"] = timed(basic, repeat)
+
+    results["outline"] = timed(lambda: main.DocumentOutline(language).update(source), repeat)
+
+    def linenumbers():
+        for frac in (0.0, 0.5, 1.0):
+            tab.text.yview_moveto(frac)
+            tab._gutter_state = None
+            tab.update_linenumbers()
+    results["update_linenumbers"] = timed(linenumbers, repeat)
+
+    def comment_all():
+        tab.text.tag_add("sel", "1.0", "end-1c")
+        tab.toggle_comment()
+    results["toggle_comment"] = timed(comment_all, repeat)
+
+    def indent_all():
+        tab.text.tag_add("sel", "1.0", "end-1c")
+        tab.on_tab_key()
+    results["on_tab_key"] = timed(indent_all, repeat)
+    app._remove_tab(tab)
+
+    def open_file():
+        before = len(app.tabs)
+        app.update_status("")
+        app.open_file(str(path))
+        opened = app.tabs[-1]
+        pump(root, lambda: len(app.tabs) > before and
+             opened.text.index("end-1c").split(".")[0] == str(size + 1) and
+             app.status_var.get().startswith("Opened"))
+        app._remove_tab(opened)
+    results["open_file"] = timed(open_file, repeat)
+    return results
+
+def bench_startup(repeat, display=True):
+    """
+    Fresh interpreters: `import main` time from -X importtime and, with a display,
+    time from interpreter start to the first painted frame. Also reports which
+    DEFERRED_MODULES were already loaded at that point. The probe restores a
+    session (this folder as the workspace, main.py open) like a normal relaunch.
+    """
+    # measure a warm start: bytecode cached, as after the first launch
+    py_compile.compile(str(HERE / "main.py"))
+    results = {}
+    samples = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                              cwd=HERE, capture_output=True, text=True)
+        for line in proc.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == "main":
+                samples.append(int(parts[1]) / 1e6)
+    if samples:
+        results["startup.import"] = statistics.median(samples)
+
+    probe = (
+        "import sys, time\n"
+        "import main\n"
+        "root = main.tk.Tk()\n"
+        "app = main.VanillaStudioApp(root)\n"
+        "root.update()\n"
+        "while not root.winfo_viewable():\n"
+        "    root.update()\n"
+        "frame = time.perf_counter()\n"
+        f"loaded = [m for m in {DEFERRED_MODULES!r} if m in sys.modules]\n"
+        "print(frame, ','.join(loaded))\n"
+        "root.destroy()\n"
+    ) if display else (
+        "import sys\n"
+        "import main\n"
+        f"print(0, ','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    frames = []
+    loaded = []
+    session = main.session_path()
+    session.parent.mkdir(parents=True, exist_ok=True)
+    session.write_text(json.dumps({"version": 1, "workspace": str(HERE), "selected": 0,
+                                   "tabs": [{"path": str(HERE / "main.py"), "language": "python"}]}),
+                       encoding="utf-8")
+    try:
+        for _ in range(repeat):
+            # perf_counter is system-wide (CLOCK_MONOTONIC) on Linux, so the parent can take t0
+            t0 = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-c", probe], cwd=HERE, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"startup probe failed:\n{proc.stderr}")
+            frame, _, mods = proc.stdout.strip().partition(" ")
+            if display:
+                frames.append(float(frame) - t0)
+            loaded = [m for m in mods.split(",") if m]
+    finally:
+        session.unlink(missing_ok=True)
+    if frames:
+        results["startup.first_frame"] = statistics.median(frames)
+    return results, loaded
+
+def check_startup(results, loaded, import_budget, frame_budget):
+    """Budget violations as printable lines."""
+    problems = []
+    if results.get("startup.import", 0) * 1000 > import_budget:
+        problems.append(f"import main took {results['startup.import'] * 1000:.1f} ms (budget {import_budget:g} ms)")
+    if results.get("startup.first_frame", 0) * 1000 > frame_budget:
+        problems.append(f"first frame after {results['startup.first_frame'] * 1000:.1f} ms (budget {frame_budget:g} ms)")
+    if loaded:
+        problems.append(f"loaded before the first frame: {', '.join(loaded)}")
+    return problems
+
+def bench_tree(app, root, repeat, workdir):
+    """_populate_tree on a synthetic workspace (1000 folders x 20 files)."""
+    ws = Path(workdir) / "workspace"
+    if not ws.exists():
+        for d in range(1000):
+            folder = ws / f"pkg{d:04d}"
+            folder.mkdir(parents=True)
+            for f in range(20):
+                (folder / f"mod{f:02d}.py").write_text("")
+    app.workspace_path = ws
+    app._tree_ignored = main.compile_ignore(main.WORKSPACE_IGNORE)
+
+    def populate():
+        app.tree.delete(*app.tree.get_children())
+        app._tree_gen += 1
+        app._populate_tree(ws, "")
+        pump(root, lambda: app._tree_pending == 0)
+    return {"_populate_tree": timed(populate, repeat)}
+
+def bench_completion(repeat, words=COMPLETION_WORDS):
+    """
+    Slowest keystroke while typing identifiers into a 1000-line buffer: the edit
+    updates BufferWords and the word before the cursor is looked up in the trie.
+    """
+    rng = random.Random(0)
+    letters = string.ascii_lowercase + "_"
+    counts = {}
+    while len(counts) < words:
+        counts["".join(rng.choice(letters) for _ in range(rng.randint(4, 16)))] = rng.randint(1, 20)
+    trie = main.CompletionTrie()
+    trie.update(counts)
+    trie.complete("")
+    buffer = main.BufferWords(trie)
+    buffer.replace_lines(1, 1, ["    total = compute(items, discount)"] * 1000)
+    worst = 0.0
+    for run in range(repeat):
+        line = 1 + 300 * run % 1000
+        text = ""
+        for ch in "result = apply_discount(order_total, customer_tier)":
+            text += ch
+            t0 = time.perf_counter()
+            buffer.replace_lines(line, line, [text])
+            word = text[len(text.rstrip(letters + string.digits)):]
+            if len(word) >= 2:
+                trie.complete(word, 9)
+            worst = max(worst, time.perf_counter() - t0)
+    return {"completion.keystroke_max": worst}
+
+def check_completion(results, budget):
+    worst = results.get("completion.keystroke_max", 0) * 1000
+    if worst > budget:
+        return [f"completion keystroke took {worst:.2f} ms (budget {budget:g} ms)"]
+    return []
+
+def bench_workspace_search(repeat, paths=SEARCH_PATHS, queries=SEARCH_QUERIES):
+    """Slowest WorkspaceIndex.search() while typing each query, on a synthetic src*/lib/pkg*/main*.py tree."""
+    index = main.WorkspaceIndex(HERE)
+    per_pkg = max(1, paths // 1000)
+    index.dirs = {f"src{a}/lib/pkg{b}": [0, [f"main{c}.py" for c in range(per_pkg)], []]
+                  for a in range(10) for b in range(100)}
+    index._publish()
+    worst = 0.0
+    for _ in range(repeat):
+        for query in queries:
+            index._narrow = None
+            for end in range(1, len(query) + 1):
+                t0 = time.perf_counter()
+                index.search(query[:end])
+                worst = max(worst, time.perf_counter() - t0)
+    return {"workspace_search.keystroke_max": worst}
+
+def check_workspace_search(results, budget):
+    worst = results.get("workspace_search.keystroke_max", 0) * 1000
+    if worst > budget:
+        return [f"quick-open keystroke took {worst:.2f} ms (budget {budget:g} ms)"]
+    return []
+
+def bench_lexer_registry(calls=100_000):
+    """Mean time of a get_lexer() call once every language's lexer exists (empty without Pygments)."""
+    if not main.USE_PYGMENTS:
+        return {}
+    for language in LANGUAGES:
+        main.get_lexer(language)
+    rounds = calls // len(LANGUAGES)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for language in LANGUAGES:
+            main.get_lexer(language)
+    return {"lexer_registry.lookup": (time.perf_counter() - t0) / (rounds * len(LANGUAGES))}
+
+def bench_token_tags(repeat):
+    """Mean time per token of TOKEN_TAGS vs map_token_to_tag over the token types of a Python buffer."""
+    if not main.USE_PYGMENTS:
+        return {}
+    source = synthetic_source("python", 5000)
+    ttypes = [ttype for _, ttype, _ in main.get_lexer("python").get_tokens_unprocessed(source)]
+    tags = main.TOKEN_TAGS
+    table = timed(lambda: [tags[ttype] for ttype in ttypes], repeat)
+    direct = timed(lambda: [main.map_token_to_tag(ttype) for ttype in ttypes], repeat)
+    return {"token_tags.lookup": table / len(ttypes), "token_tags.map_token_to_tag": direct / len(ttypes)}
+
+def check_lexer_tables(results, lookup_budget, tag_budget):
+    problems = []
+    lookup = results.get("lexer_registry.lookup", 0) * 1e6
+    if lookup > lookup_budget:
+        problems.append(f"get_lexer took {lookup:.2f} us per call (budget {lookup_budget:g} us)")
+    tag = results.get("token_tags.lookup", 0) * 1e6
+    if tag > tag_budget:
+        problems.append(f"TOKEN_TAGS lookup took {tag:.3f} us per token (budget {tag_budget:g} us)")
+    return problems
+
+# ---------------------------
+# Baselines
+# ---------------------------
+def compare(results, baseline, threshold):
+    """Paths slower than baseline by more than `threshold` percent."""
+    regressions = []
+    for key, value in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None or base <= 0:
+            continue
+        change = (value - base) / base * 100
+        if change > threshold:
+            regressions.append((key, base, value, change))
+    return regressions
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Vanilla Studio editor benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated line counts (default: %(default)s)")
+    parser.add_argument("--languages", default=",".join(LANGUAGES),
+                        help="comma-separated languages (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (median is kept)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=25.0,
+                        help="fail when a path is slower than baseline by more than this percent")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_MS,
+                        help="max ms for 'import main' (default: %(default)s)")
+    parser.add_argument("--frame-budget", type=float, default=FIRST_FRAME_BUDGET_MS,
+                        help="max ms from interpreter start to the first frame (default: %(default)s)")
+    parser.add_argument("--completion-budget", type=float, default=COMPLETION_BUDGET_MS,
+                        help="max ms per keystroke for word completion (default: %(default)s)")
+    parser.add_argument("--search-budget", type=float, default=SEARCH_BUDGET_MS,
+                        help="max ms per quick-open keystroke (default: %(default)s)")
+    parser.add_argument("--lexer-budget", type=float, default=LEXER_LOOKUP_BUDGET_US,
+                        help="max us per warm get_lexer() call (default: %(default)s)")
+    parser.add_argument("--token-tag-budget", type=float, default=TOKEN_TAG_BUDGET_US,
+                        help="max us per TOKEN_TAGS lookup (default: %(default)s)")
+    parser.add_argument("--startup-only", action="store_true",
+                        help="only check the startup budgets (the import check also runs without a display)")
+    args = parser.parse_args(argv)
+
+    if args.startup_only:
+        display = sys.platform != "linux" or bool(os.environ.get("DISPLAY"))
+        with tempfile.TemporaryDirectory() as cache:
+            os.environ["XDG_CACHE_HOME"] = cache
+            results, loaded = bench_startup(args.repeat, display=display)
+        for name, secs in results.items():
+            print(f"{name:60s} {secs * 1000:10.2f} ms")
+        problems = check_startup(results, loaded, args.import_budget, args.frame_budget)
+        for problem in problems:
+            print(f"STARTUP BUDGET: {problem}")
+        return 1 if problems else 0
+
+    xvfb = ensure_display()
+    workdir_obj = tempfile.TemporaryDirectory()
+    workdir = workdir_obj.name
+    # keep the user's session, caches and logs out of the measurements
+    os.environ["XDG_CACHE_HOME"] = str(Path(workdir) / "cache")
+    startup, loaded = bench_startup(args.repeat)
+    problems = check_startup(startup, loaded, args.import_budget, args.frame_budget)
+    root = main.tk.Tk()
+    try:
+        app = main.VanillaStudioApp(root)
+        root.update()
+        pump(root, lambda: app.painted)  # highlighting starts after the first frame
+        results = dict(startup)
+        for name, secs in startup.items():
+            print(f"{name:60s} {secs * 1000:10.2f} ms", flush=True)
+        for language in args.languages.split(","):
+            for size in map(int, args.sizes.split(",")):
+                for name, secs in bench_language(app, root, language, size, args.repeat, workdir).items():
+                    key = f"{name}[{language}:{size}]"
+                    results[key] = secs
+                    print(f"{key:60s} {secs * 1000:10.2f} ms", flush=True)
+        for name, secs in bench_tree(app, root, args.repeat, workdir).items():
+            results[name] = secs
+            print(f"{name:60s} {secs * 1000:10.2f} ms", flush=True)
+        completion = bench_completion(args.repeat)
+        for name, secs in completion.items():
+            results[name] = secs
+            print(f"{name:60s} {secs * 1000:10.2f} ms", flush=True)
+        problems += check_completion(completion, args.completion_budget)
+        search = bench_workspace_search(args.repeat)
+        for name, secs in search.items():
+            results[name] = secs
+            print(f"{name:60s} {secs * 1000:10.2f} ms", flush=True)
+        problems += check_workspace_search(search, args.search_budget)
+        tables = {**bench_lexer_registry(), **bench_token_tags(args.repeat)}
+        for name, secs in tables.items():
+            results[name] = secs
+            print(f"{name:60s} {secs * 1e6:10.3f} us", flush=True)
+        problems += check_lexer_tables(tables, args.lexer_budget, args.token_tag_budget)
+    finally:
+        root.destroy()
+        workdir_obj.cleanup()
+        if xvfb is not None:
+            xvfb.terminate()
+
+    for problem in problems:
+        print(f"BUDGET: {problem}")
+    if args.save:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+        return 1 if problems else 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save first.")
+        return 1 if problems else 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline, args.threshold)
+    for key, base, value, change in regressions:
+        print(f"REGRESSION {key}: {base * 1000:.2f} ms -> {value * 1000:.2f} ms (+{change:.0f}%)")
+    if regressions or problems:
+        return 1
+    print(f"No regressions over {args.threshold:g}%.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,51 @@
+"""
+Find-in-files worker for Vanilla Studio.
+
+Kept out of main.py on purpose: the search pool spawns its processes, and every
+one of them imports the module its worker function lives in. This one only needs
+the standard library, so a worker starts without loading tkinter and the editor.
+"""
+import os
+import re
+
+FIND_MAX_FILE_SIZE = 16 * 1024 * 1024  # larger files are skipped
+FIND_MAX_MATCHES_PER_FILE = 1000
+
+def compile_search(pattern, is_regex=False, ignore_case=False):
+    """Compile a find pattern (plain text or regex) into a regex object."""
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    return re.compile(pattern if is_regex else re.escape(pattern), flags)
+
+def search_files(paths, pattern, is_regex=False, ignore_case=False):
+    """
+    Worker for find-in-files (runs in a pool process): scan `paths` and return
+    [(path, line, col, line_text), ...]. Binary files (NUL byte in the first 8 KB)
+    and files over FIND_MAX_FILE_SIZE are skipped.
+    """
+    rx = compile_search(pattern, is_regex, ignore_case)
+    results = []
+    for path in paths:
+        try:
+            if os.path.getsize(path) > FIND_MAX_FILE_SIZE:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        if b"\0" in data[:8192]:
+            continue
+        text = data.decode("utf-8", errors="replace")
+        # matches come in order, so line numbers are counted forward from the last one
+        ln, counted = 0, 0
+        count = 0
+        for m in rx.finditer(text):
+            ln += text.count("\n", counted, m.start())
+            counted = m.start()
+            start = text.rfind("\n", 0, m.start()) + 1
+            end = text.find("\n", m.start())
+            line_text = text[start:end if end != -1 else len(text)]
+            results.append((path, ln + 1, m.start() - start, line_text.rstrip("\r")[:300]))
+            count += 1
+            if count >= FIND_MAX_MATCHES_PER_FILE or m.end() == len(text):
+                break
+    return results
@@ -1,31 +1,79 @@
 import os
 import sys
-import subprocess
-import tempfile
+import io
+import mmap
+import shutil
+import atexit
+import signal
+import codecs
+import queue
 import threading
-import webbrowser
+import importlib
+import importlib.util
 from pathlib import Path
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, simpledialog
+from tkinter import ttk, filedialog, messagebox
+from tkinter import font as tkfont
 from tkinter.scrolledtext import ScrolledText
 import re
+import json
 import time
+import zlib
+import heapq
+import fnmatch
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from itertools import accumulate, chain, repeat
+from filesearch import compile_search, search_files
 
-# Try to import Pygments for improved highlighting
-try:
-    from pygments import lex
-    from pygments.lexers import (
-        PythonLexer, CLexer, CppLexer, HtmlLexer, CssLexer, JavascriptLexer,
-        RustLexer, JavaLexer, LuaLexer, TypeScriptLexer, GoLexer, 
-        CSharpLexer, RubyLexer, KotlinLexer, NixLexer
-    )
-    from pygments.token import Token
-    USE_PYGMENTS = True
-except Exception:
-    USE_PYGMENTS = False
+# Pygments (improved highlighting) is optional. It is only located here; the
+# modules are imported on first use, off the Tk thread (see load_pygments()).
+# subprocess, tempfile, hashlib, webbrowser, logging and multiprocessing are also
+# imported where they are used, so none of them delay the first frame.
+USE_PYGMENTS = importlib.util.find_spec("pygments") is not None
 
 APP_TITLE = "Vanilla Studio IDE"
 
+# max characters of program output kept in the console per run
+RUN_OUTPUT_LIMIT = 1_000_000
+
+# files at least this big open in large-file mode (chunked load, read-only, no highlighting)
+LARGE_FILE_THRESHOLD = 5 * 1024 * 1024
+LARGE_FILE_CHUNK = 64 * 1024
+# max time (seconds) spent inserting chunks per idle callback, about one frame
+LARGE_FILE_FRAME_BUDGET = 0.012
+
+# background tabs idle this long (seconds) are hibernated: text compressed, tags and undo dropped
+TAB_HIBERNATE_AFTER = 10 * 60
+
+# per-language time limit in seconds for each compile/run step (0 or None = no limit);
+# VANILLA_RUN_TIMEOUTS overrides entries, e.g. "default=0,rust=300"
+RUN_TIMEOUTS = {
+    "default": 60,
+    "rust": 120,
+    "java": 120,
+    "kotlin": 180,
+    "csharp": 180,
+    "nix": 600,
+}
+
+def _parse_timeouts(spec):
+    """{language: seconds} from "language=seconds,..."; malformed entries are skipped."""
+    timeouts = {}
+    for item in spec.split(","):
+        language, _, seconds = item.partition("=")
+        try:
+            timeouts[language.strip().lower()] = float(seconds)
+        except ValueError:
+            pass
+    return timeouts
+
+RUN_TIMEOUTS.update(_parse_timeouts(os.environ.get("VANILLA_RUN_TIMEOUTS", "")))
+
+def run_timeout(language):
+    """Seconds a compile or run step of `language` may take, None for no limit."""
+    return RUN_TIMEOUTS.get(language, RUN_TIMEOUTS["default"]) or None
+
 # default extension mapping by language 
 LANG_EXT = {
     "Python": ".py",
@@ -50,22 +98,2178 @@ LANG_EXT = {
     "Nix": ".nix",
 }
 
+# language by file extension (opening files, workspace symbol index)
+EXT_LANG = {
+    "py": "python", "c": "c", "h": "c", "cpp": "cpp", "cc": "cpp", "cxx": "cpp", "hpp": "cpp",
+    "html": "html", "htm": "html", "css": "css", "js": "javascript", "ts": "typescript",
+    "rs": "rust", "java": "java", "lua": "lua", "go": "go", "cs": "csharp", "rb": "ruby",
+    "kt": "kotlin", "nix": "nix",
+}
+
 # ---------------------------
 # Helpers
 # ---------------------------
-def safe_run_subprocess(cmd, cwd=None, timeout=60):
-    """Run subprocess and return (returncode, stdout, stderr)"""
+# every child started by stream_subprocess that has not exited yet
+_CHILD_PROCS = set()
+_CHILD_LOCK = threading.Lock()
+
+def kill_process_group(proc, grace=2.0):
+    """Terminate `proc` and everything in its process group: SIGTERM first, SIGKILL after `grace` s."""
+    import subprocess
+    if os.name == "posix":
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            return
+        try:
+            proc.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            pass
+        # also reaps children that ignored SIGTERM or outlived the leader
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    else:
+        if proc.poll() is not None:
+            return
+        try:
+            proc.send_signal(signal.CTRL_BREAK_EVENT)
+            proc.wait(timeout=grace)
+        except Exception:
+            pass
+        if proc.poll() is None:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     try:
-        proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=False, timeout=timeout, text=True)
-        return proc.returncode, proc.stdout, proc.stderr
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+
+def kill_all_children():
+    """Kill every process group still running (used on Stop-all and at exit)."""
+    with _CHILD_LOCK:
+        procs = list(_CHILD_PROCS)
+    for proc in procs:
+        kill_process_group(proc, grace=0.5)
+
+atexit.register(kill_all_children)
+
+def stream_subprocess(cmd, cwd=None, on_output=None, timeout=60, stop_event=None):
+    """
+    Run subprocess and forward its output as it arrives:
+    - the child gets its own process group so it can be stopped with all its children
+    - stdout/stderr are read incrementally on reader threads
+    - on_output(text, is_stderr) is called for every decoded chunk
+    - setting `stop_event` or exceeding `timeout` (seconds, None = no limit) kills the group
+    Returns the returncode (-1 if the process could not be started or timed out).
+    """
+    import subprocess
+    if os.name == "posix":
+        group_kw = {"start_new_session": True}
+    else:
+        group_kw = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    try:
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                stdin=subprocess.DEVNULL, shell=False, **group_kw)
     except Exception as e:
-        return -1, "", str(e)
+        if on_output:
+            on_output(f"{e}\n", True)
+        return -1
+    with _CHILD_LOCK:
+        _CHILD_PROCS.add(proc)
+
+    def reader(pipe, is_stderr):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with pipe:
+            while True:
+                chunk = pipe.read1(4096)
+                text = decoder.decode(chunk, final=not chunk)
+                if text and on_output:
+                    on_output(text, is_stderr)
+                if not chunk:
+                    break
+
+    readers = [threading.Thread(target=reader, args=(proc.stdout, False), daemon=True),
+               threading.Thread(target=reader, args=(proc.stderr, True), daemon=True)]
+    for t in readers:
+        t.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    killed = False
+    try:
+        while True:
+            try:
+                code = proc.wait(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if stop_event is not None and stop_event.is_set():
+                kill_process_group(proc)
+                killed = True
+                if on_output:
+                    on_output("Process stopped.\n", True)
+            elif deadline is not None and time.monotonic() > deadline:
+                kill_process_group(proc)
+                killed = True
+                if on_output:
+                    on_output(f"Process timed out after {timeout}s and was killed.\n", True)
+        if not killed and os.name == "posix":
+            # leader exited: don't leave background children of the program running
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+    finally:
+        with _CHILD_LOCK:
+            _CHILD_PROCS.discard(proc)
+    for t in readers:
+        # a child that escaped the group may still hold the pipes open
+        t.join(timeout=None if not killed else 1.0)
+    return -1 if killed else code
 
 def which(executable):
     """Check if executable is in PATH"""
     from shutil import which as _which
     return _which(executable) is not None
 
+def user_cache_dir():
+    """Per-user cache folder for Vanilla Studio (XDG / LOCALAPPDATA / ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base and os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA")
+    return Path(base or Path.home() / ".cache") / "vanilla-studio"
+
+def session_path():
+    return user_cache_dir() / "session.json"
+
+# ---------------------------
+# Performance instrumentation
+# ---------------------------
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+class Profiler:
+    """
+    Opt-in timers and counters for the editor's hot paths (lex, tag, gutter,
+    open, save, run). Off by default: span() then returns a shared no-op context.
+    Keeps the last SAMPLES durations per phase for last/p95 readouts and a bounded
+    event log that can be exported as a Chrome trace (chrome://tracing, Perfetto).
+    """
+    SAMPLES = 200
+    MAX_EVENTS = 200_000
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter()
+        self._samples = {}
+        self._counters = {}
+        self._events = deque(maxlen=self.MAX_EVENTS)
+
+    def span(self, name):
+        """`with PROFILER.span("gutter"): ...` times the block when enabled."""
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def record(self, name, start, duration):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.SAMPLES)
+            samples.append(duration)
+            self._events.append(("X", name, start, duration, threading.get_ident()))
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            value = self._counters[name] = self._counters.get(name, 0) + n
+            self._events.append(("C", name, time.perf_counter(), value, threading.get_ident()))
+
+    def stats(self):
+        """{phase: (last, p95, samples)} in seconds, plus {counter: value}."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            counters = dict(self._counters)
+        out = {}
+        for name, values in samples.items():
+            ordered = sorted(values)
+            out[name] = (values[-1], ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], len(values))
+        return out, counters
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counters.clear()
+            self._events.clear()
+
+    def export_chrome_trace(self, path):
+        """Write the recorded events in Chrome trace JSON format; returns the event count."""
+        with self._lock:
+            events = list(self._events)
+        pid = os.getpid()
+        trace = []
+        for kind, name, start, value, tid in events:
+            ts = (start - self._epoch) * 1e6
+            if kind == "X":
+                trace.append({"name": name, "ph": "X", "ts": ts, "dur": value * 1e6, "pid": pid, "tid": tid})
+            else:
+                trace.append({"name": name, "ph": "C", "ts": ts, "pid": pid, "tid": tid, "args": {name: value}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return len(trace)
+
+# set VANILLA_PROFILE=1 to record from startup; otherwise View > Performance Overlay turns it on
+PROFILER = Profiler(enabled=bool(os.environ.get("VANILLA_PROFILE")))
+
+# ---------------------------
+# Main-loop stall watchdog
+# ---------------------------
+STALL_THRESHOLD = 0.1        # seconds the Tk loop may go without servicing the heartbeat
+STALL_LOG_BYTES = 1024 * 1024
+STALL_LOG_BACKUPS = 3
+
+def stall_log_path():
+    return user_cache_dir() / "logs" / "stalls.log"
+
+class StallWatchdog:
+    """
+    Detects UI freezes. The Tk thread bumps a heartbeat from an after() callback
+    every `interval` seconds; a daemon thread watches it and, once the heartbeat
+    is `threshold` late, grabs the main thread's stack from sys._current_frames().
+    When the loop recovers the stall duration and stack go to a rotating log.
+    """
+
+    def __init__(self, root, threshold=STALL_THRESHOLD, interval=0.05, log_path=None):
+        self.root = root
+        self.threshold = threshold
+        self.interval = interval
+        self.log_path = Path(log_path) if log_path else stall_log_path()
+        self.stalls = 0
+        self._beat = time.perf_counter()
+        self._main_ident = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._logger = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._beat = time.perf_counter()
+        self.root.after(int(self.interval * 1000), self._heartbeat)
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _heartbeat(self):
+        if self._stop.is_set():
+            return
+        self._beat = time.perf_counter()
+        try:
+            self.root.after(int(self.interval * 1000), self._heartbeat)
+        except tk.TclError:
+            self._stop.set()  # root destroyed
+
+    def _watch(self):
+        pending = None  # (beat, stack) of the stall in progress
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            if pending is not None:
+                if beat != pending[0]:
+                    # loop is back: the late heartbeat tells how long it was blocked
+                    self._report(pending[0], beat - pending[0] - self.interval, pending[1])
+                    pending = None
+                continue
+            if time.perf_counter() - beat > self.threshold + self.interval:
+                import traceback
+                frame = sys._current_frames().get(self._main_ident)
+                stack = "".join(traceback.format_stack(frame)) if frame else "  <main thread not found>\n"
+                pending = (beat, stack)
+
+    def _report(self, start, duration, stack):
+        self.stalls += 1
+        if PROFILER.enabled:
+            PROFILER.record("stall", start + self.interval, duration)
+        logger = self._get_logger()
+        if logger is not None:
+            logger.warning("UI stall of %.0f ms; main thread was in:\n%s", duration * 1000, stack)
+
+    def _get_logger(self):
+        if self._logger is None:
+            import logging
+            from logging.handlers import RotatingFileHandler
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(self.log_path, maxBytes=STALL_LOG_BYTES,
+                                              backupCount=STALL_LOG_BACKUPS, encoding="utf-8")
+            except OSError:
+                return None
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger = logging.getLogger("vanilla_studio.stalls")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+# ---------------------------
+# Workspace listing
+# ---------------------------
+# names hidden from the workspace tree; a workspace can add more in a .vanillaignore file
+WORKSPACE_IGNORE = [
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+    "build", "dist", "target", ".idea", ".vs", ".mypy_cache", ".pytest_cache",
+]
+
+def load_ignore_patterns(root):
+    """WORKSPACE_IGNORE plus the glob patterns listed in <root>/.vanillaignore."""
+    patterns = list(WORKSPACE_IGNORE)
+    try:
+        with open(Path(root) / ".vanillaignore", "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    patterns.append(line.rstrip("/"))
+    except OSError:
+        pass
+    return patterns
+
+def compile_ignore(patterns):
+    """Compile glob patterns into one matcher: ignored(name) -> bool."""
+    if not patterns:
+        return lambda name: False
+    rx = re.compile("|".join(fnmatch.translate(p) for p in patterns))
+    return lambda name: rx.match(name) is not None
+
+def list_directory(path, ignored=None):
+    """
+    One level of `path` as [(name, fullpath, is_dir)], folders first, then by name.
+    Uses os.scandir so the type of each entry comes from the directory read itself.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for e in it:
+            if ignored is not None and ignored(e.name):
+                continue
+            try:
+                is_dir = e.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append((not is_dir, e.name.lower(), e.name, e.path, is_dir))
+    entries.sort()
+    return [(name, full, is_dir) for _f, _k, name, full, is_dir in entries]
+
+# ---------------------------
+# Workspace file index (quick open)
+# ---------------------------
+class WorkspaceIndex:
+    """
+    List of every file in a workspace, persisted under the user cache folder.
+    - refresh() rescans only folders whose mtime changed since the saved index
+    - search() ranks fuzzy matches: basename prefix, basename substring, path
+      substring, basename subsequence, path subsequence (shorter paths first)
+    Paths are matched against one lowercase blob ("/path\n" per file), and basename
+    subsequences against a blob of basenames, with C-level str.find / regex scans
+    instead of a Python loop per file. Subsequence scans stop once `limit` results
+    are certain.
+    """
+
+    VERSION = 1
+    CANDIDATES = 500    # max matching files ranked per query
+    NARROW_LIMIT = 5000  # fuzzy matches kept as the search space for longer queries
+
+    def __init__(self, root, ignore_patterns=None):
+        self.root = str(root)
+        self.ignore_patterns = list(ignore_patterns if ignore_patterns is not None else WORKSPACE_IGNORE)
+        self._ignored = compile_ignore(self.ignore_patterns)
+        self.dirs = {}       # relative folder -> [mtime_ns, [file names], [subfolder names]]
+        self.ready = False
+        self._corpus = ("", [0], [], "", [0])  # (blob, line starts, paths, basename blob, line starts)
+        self._narrow = None            # (query, corpus) holding every fuzzy match of query
+        import hashlib
+        key = hashlib.sha1(os.path.abspath(self.root).encode("utf-8")).hexdigest()[:16]
+        self.store_path = user_cache_dir() / "index" / f"{key}.json"
+
+    # -- building -------------------------------------------------------------
+    def load(self):
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != self.VERSION or data.get("ignore") != self.ignore_patterns:
+            return False
+        self.dirs = data.get("dirs", {})
+        self._publish()
+        return True
+
+    def save(self):
+        try:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.store_path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "root": self.root,
+                           "ignore": self.ignore_patterns, "dirs": self.dirs}, f)
+            os.replace(tmp, self.store_path)
+        except OSError:
+            pass
+
+    def refresh(self):
+        """Bring the index up to date; folders with an unchanged mtime are not listed again."""
+        old, new = self.dirs, {}
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            full = os.path.join(self.root, rel) if rel else self.root
+            try:
+                mtime = os.stat(full).st_mtime_ns
+            except OSError:
+                continue
+            entry = old.get(rel)
+            if entry is None or entry[0] != mtime:
+                files, subdirs = [], []
+                try:
+                    for name, _full, is_dir in list_directory(full, self._ignored):
+                        (subdirs if is_dir else files).append(name)
+                except OSError:
+                    pass
+                entry = [mtime, files, subdirs]
+            new[rel] = entry
+            stack.extend(f"{rel}/{d}" if rel else d for d in entry[2])
+        self.dirs = new
+        self._publish()
+
+    def update(self):
+        """load() + refresh() + save(); meant to run on a background thread."""
+        self.load()
+        self.refresh()
+        self.save()
+
+    def _publish(self):
+        paths = [f"{rel}/{name}" if rel else name
+                 for rel, entry in self.dirs.items() for name in entry[1]]
+        paths.sort(key=lambda p: (len(p), p))
+        # swap in a complete corpus at once; search() may run concurrently
+        self._corpus = self._make_corpus(paths)
+        self._narrow = None
+        self.ready = True
+
+    @staticmethod
+    def _make_corpus(paths):
+        blob = "".join(f"/{p.lower()}\n" for p in paths)
+        starts = list(accumulate((len(p) + 2 for p in paths[:-1]), initial=0)) if paths else [0]
+        names = [p[p.rfind("/") + 1:].lower() for p in paths]
+        name_blob = "".join(f"{n}\n" for n in names)
+        name_starts = list(accumulate((len(n) + 1 for n in names[:-1]), initial=0)) if paths else [0]
+        return blob, starts, paths, name_blob, name_starts
+
+    def __len__(self):
+        return len(self._corpus[2])
+
+    # -- searching ------------------------------------------------------------
+    def search(self, query, limit=50):
+        """Best `limit` relative paths for `query`, best first."""
+        q = query.strip().lower().replace("\\", "/")
+        corpus = self._corpus
+        if not q:
+            return corpus[2][:limit]
+        narrow = self._narrow
+        if narrow is not None and q.startswith(narrow[0]):
+            corpus = narrow[1]  # every match of q is a match of the shorter query
+        blob, starts, paths, name_blob, name_starts = corpus
+        found = {}  # line -> tier
+
+        def line_at(pos):
+            return bisect_right(starts, pos) - 1
+
+        # tiers 0-2: literal substring
+        pos = blob.find(q)
+        while pos != -1 and len(found) < self.CANDIDATES:
+            ln = line_at(pos)
+            end = blob.find("\n", pos)
+            if "/" not in blob[pos:end]:
+                tier = 0 if blob[pos - 1] == "/" else 1
+            else:
+                tier = 2
+            found[ln] = min(tier, found.get(ln, tier))
+            pos = blob.find(q, pos + 1)
+        # tiers 3-4: subsequence, first occurrence of each char ([^c]*c cannot skip a c); lines are
+        # sorted best first within a tier, so each scan stops once `limit` results are certain
+        if len(found) < limit:
+            e = re.escape
+            rx = re.compile(e(q[0]) + "".join(f"[^{e(c)}\n]*{e(c)}" for c in q[1:]))
+            if "/" not in q:
+                for m in rx.finditer(name_blob):
+                    ln = bisect_right(name_starts, m.start()) - 1
+                    found.setdefault(ln, 3)
+                    if len(found) >= limit:
+                        break
+        if len(found) < limit:
+            lines = []
+            exhausted = True
+            for m in rx.finditer(blob):
+                ln = line_at(m.start())
+                if lines and lines[-1] == ln:
+                    continue
+                lines.append(ln)
+                found.setdefault(ln, 4)
+                if len(found) >= limit:
+                    exhausted = False
+                    break
+            if exhausted and len(lines) <= self.NARROW_LIMIT:
+                # the next keystroke (a longer query) only has to look at these files
+                self._narrow = (q, self._make_corpus([paths[ln] for ln in lines]))
+        ranked = sorted(found, key=lambda ln: (found[ln], ln))
+        return [paths[ln] for ln in ranked[:limit]]
+
+# ---------------------------
+# Find in files
+# ---------------------------
+# compile_search() and search_files() live in filesearch.py, which spawned pool
+# workers can import without loading tkinter
+FIND_BATCH_BYTES = 2 * 1024 * 1024     # files are sent to workers in batches of about this size
+
+_SEARCH_POOL = None
+
+def get_search_pool():
+    """Shared worker pool for find-in-files (one process per core; threads if processes are unavailable)."""
+    global _SEARCH_POOL
+    if _SEARCH_POOL is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        try:
+            _SEARCH_POOL = ProcessPoolExecutor(max_workers=os.cpu_count() or 2,
+                                               mp_context=multiprocessing.get_context("spawn"))
+        except Exception:
+            _SEARCH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+    return _SEARCH_POOL
+
+def iter_workspace_files(root, ignored=None):
+    """Yield every file path under `root`, skipping ignored names (no sorting)."""
+    stack = [str(root)]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for e in it:
+                    if ignored is not None and ignored(e.name):
+                        continue
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            stack.append(e.path)
+                        elif e.is_file():
+                            yield e.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+class FileSearch:
+    """
+    One find-in-files run: a producer thread walks the workspace and submits file
+    batches to the shared pool; every finished batch is put on `results`
+    as a list of matches. A batch that failed (e.g. its worker process died) is
+    put on `errors` as (files in it, exception) instead; None files means the walk
+    itself failed. `done` is set once all batches have been reported.
+    """
+
+    def __init__(self, root, pattern, is_regex=False, ignore_case=False, ignored=None):
+        compile_search(pattern, is_regex, ignore_case)  # raises re.error early
+        self.root = root
+        self.args = (pattern, is_regex, ignore_case)
+        self.ignored = ignored
+        self.results = queue.Queue()
+        self.errors = queue.Queue()
+        self.done = threading.Event()
+        self.cancelled = False
+        self.files_scanned = 0
+        self._futures = []
+        self._lock = threading.Lock()
+        self._outstanding = 1  # the producer itself
+        threading.Thread(target=self._produce, daemon=True).start()
+
+    def cancel(self):
+        self.cancelled = True
+        with self._lock:
+            for fut in self._futures:
+                fut.cancel()
+
+    def _produce(self):
+        pool = get_search_pool()
+        batch, size = [], 0
+        try:
+            for path in iter_workspace_files(self.root, self.ignored):
+                if self.cancelled:
+                    break
+                try:
+                    size += os.path.getsize(path)
+                except OSError:
+                    continue
+                batch.append(path)
+                # small first batches so the first hits show up quickly
+                if size >= FIND_BATCH_BYTES or len(batch) >= (16 if len(self._futures) < 8 else 256):
+                    self._submit(pool, batch)
+                    batch, size = [], 0
+            if batch and not self.cancelled:
+                self._submit(pool, batch)
+        except Exception as e:
+            self.errors.put((None, e))  # e.g. the pool broke and takes no more batches
+        finally:
+            self._finish_one()
+
+    def _submit(self, pool, batch):
+        with self._lock:
+            self._outstanding += 1
+            fut = pool.submit(search_files, batch, *self.args)
+            self._futures.append(fut)
+        n = len(batch)
+        fut.add_done_callback(lambda f: self._collect(f, n))
+
+    def _collect(self, fut, n):
+        if not fut.cancelled():
+            error = fut.exception()
+            if error is not None:
+                if not self.cancelled:
+                    self.errors.put((n, error))
+            else:
+                with self._lock:  # callbacks run on the pool's threads
+                    self.files_scanned += n
+                matches = fut.result()
+                if matches and not self.cancelled:
+                    self.results.put(matches)
+        self._finish_one()
+
+    def _finish_one(self):
+        with self._lock:
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self.done.set()
+
+# ---------------------------
+# Build cache (compiled languages)
+# ---------------------------
+BUILD_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+_TOOLCHAIN_VERSIONS = {}
+
+def toolchain_version(executable, version_flag="--version", stop_event=None):
+    """
+    Version banner of a compiler, memoized per binary (path, mtime, size). The probe
+    runs through stream_subprocess(), so Stop and the exit cleanup can kill it.
+    """
+    path = shutil.which(executable)
+    if not path:
+        return ""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return path
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _TOOLCHAIN_VERSIONS:
+        out, err = [], []
+        code = stream_subprocess([path, version_flag], timeout=30, stop_event=stop_event,
+                                 on_output=lambda text, is_stderr: (err if is_stderr else out).append(text))
+        banner = f"{path}\n{''.join(out)}{''.join(err)}"
+        if code == -1:
+            return banner  # stopped or timed out: probe again next time
+        _TOOLCHAIN_VERSIONS[key] = banner
+    return _TOOLCHAIN_VERSIONS[key]
+
+_C_INCLUDE_RE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*"([^"\n]+)"', re.M)
+_RUST_MOD_RE = re.compile(r"^[ \t]*(?:pub(?:\([^)\n]*\))?[ \t]+)?mod[ \t]+(\w+)[ \t]*;", re.M)
+_TS_IMPORT_RE = re.compile(r"""(?:\bfrom|\bimport|\brequire\()[ \t]*['"](\.\.?/[^'"\n]+)['"]""")
+_C_SUFFIXES = {".c", ".h", ".cc", ".cpp", ".cxx", ".hh", ".hpp", ".hxx", ".inl"}
+_TS_SUFFIXES = {".ts", ".tsx", ".mts", ".cts", ".js"}
+BUILD_DEPS_MAX = 1000  # local dependencies followed per build
+
+def _local_imports(path, text, is_root):
+    """Candidate paths of the local files `path` pulls in (quoted includes, Rust mods, relative TS imports)."""
+    suffix = path.suffix.lower()
+    if suffix in _C_SUFFIXES:
+        return [[path.parent / name] for name in _C_INCLUDE_RE.findall(text)]
+    if suffix == ".rs":
+        # `mod x;` resolves next to the crate root / mod.rs, else in a folder named after the file
+        base = path.parent if is_root or path.name in ("mod.rs", "lib.rs", "main.rs") else path.parent / path.stem
+        return [[base / f"{name}.rs", base / name / "mod.rs"] for name in _RUST_MOD_RE.findall(text)]
+    if suffix in _TS_SUFFIXES:
+        out = []
+        for spec in _TS_IMPORT_RE.findall(text):
+            p = path.parent / spec
+            out.append([p] + [p.with_name(p.name + ext) for ext in (".ts", ".tsx", ".d.ts", ".js")]
+                       + [p / "index.ts", p / "index.tsx"])
+        return out
+    return []
+
+def source_dependencies(source):
+    """Local files `source` includes or imports, transitively (source itself excluded), sorted."""
+    source = Path(source).resolve()
+    seen = {source}
+    todo = [(source, True)]
+    while todo and len(seen) <= BUILD_DEPS_MAX:
+        path, is_root = todo.pop()
+        try:
+            text = path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+        for candidates in _local_imports(path, text, is_root):
+            for cand in candidates:
+                if cand.is_file():
+                    cand = cand.resolve()
+                    if cand not in seen:
+                        seen.add(cand)
+                        todo.append((cand, False))
+                    break
+    seen.discard(source)
+    return sorted(seen)
+
+class BuildCache:
+    """
+    Content-addressed store of compiled artifacts:
+    - key = hash(source bytes, local dependencies, compiler command line, toolchain version)
+    - one folder per key; its mtime is bumped on every hit
+    - least recently used folders are evicted once the total exceeds max_bytes
+    Dependencies are the quoted #includes, Rust `mod` files and relative TS imports
+    found by source_dependencies(); system headers and packages are covered by the toolchain.
+    """
+
+    OUT = "{out}"  # placeholder for the artifact path inside command lines
+
+    def __init__(self, root, max_bytes=BUILD_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def key(self, source, cmd, toolchain):
+        import hashlib
+        h = hashlib.sha256()
+        h.update(Path(source).read_bytes())
+        for dep in source_dependencies(source):
+            h.update(b"\0" + str(dep).encode("utf-8") + b"\0")
+            try:
+                h.update(dep.read_bytes())
+            except OSError:
+                pass
+        h.update(b"\0" + "\0".join(cmd).encode("utf-8"))
+        h.update(b"\0" + toolchain.encode("utf-8"))
+        return h.hexdigest()
+
+    def lookup(self, key, name):
+        """Path of the cached artifact for `key`, or None."""
+        artifact = self.root / key / name
+        if not artifact.exists():
+            return None
+        try:
+            os.utime(self.root / key)
+        except OSError:
+            pass
+        return artifact
+
+    def build(self, key, name, compile_fn):
+        """
+        Run compile_fn(out_path) -> returncode into a staging folder and publish it
+        under `key`. Returns the artifact path, or None if compilation failed.
+        """
+        import tempfile
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f"{key[:16]}-", dir=self.root))
+        try:
+            if compile_fn(staging / name) != 0 or not (staging / name).exists():
+                return None
+            try:
+                os.replace(staging, self.root / key)
+            except OSError:
+                pass  # a concurrent build of the same key won; use that one
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=key)
+        return self.lookup(key, name)
+
+    def evict(self, keep=None):
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.root) as it:
+                for d in it:
+                    if not d.is_dir(follow_symlinks=False) or d.name == keep:
+                        continue
+                    size = 0
+                    for dirpath, _dirs, files in os.walk(d.path):
+                        for f in files:
+                            try:
+                                size += os.path.getsize(os.path.join(dirpath, f))
+                            except OSError:
+                                pass
+                    entries.append((d.stat().st_mtime, size, d.path))
+                    total += size
+        except OSError:
+            return
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+_BUILD_CACHE = None
+
+def get_build_cache():
+    global _BUILD_CACHE
+    if _BUILD_CACHE is None:
+        _BUILD_CACHE = BuildCache(user_cache_dir() / "build")
+    return _BUILD_CACHE
+
+def cached_compile(source, cmd, toolchain, name, run, cwd=None, on_output=None):
+    """
+    Compile `source` with `cmd` (which contains BuildCache.OUT where the artifact
+    path goes) unless an identical build is cached. `run(cmd, cwd)` executes a step.
+    Returns the artifact path or None if compilation failed.
+    """
+    cache = get_build_cache()
+    key = cache.key(source, cmd, toolchain)
+    artifact = cache.lookup(key, name)
+    if artifact is not None:
+        if on_output:
+            on_output("(up to date, using cached build)\n", False)
+        return artifact
+
+    def compile_fn(out):
+        return run([str(out) if part == BuildCache.OUT else part for part in cmd], cwd=cwd)
+    return cache.build(key, name, compile_fn)
+
+# ---------------------------
+# Run manager (concurrent runs, bounded by the CPU count)
+# ---------------------------
+RUN_PANES_KEEP = 8  # finished run panes kept in the console before the oldest are dropped
+
+class RunJob:
+    """
+    One run of a file. The worker thread queues its output on `output`; the UI drains it.
+    status: queued -> running -> exited / stopped / error; exit_code is set when known.
+    """
+
+    def __init__(self, run_id, name, target):
+        self.id = run_id
+        self.name = name
+        self.target = target  # target(job) -> exit code or None, called on a run thread
+        self.stop_event = threading.Event()
+        self.output = queue.Queue()
+        self.status = "queued"
+        self.exit_code = None
+        self.started = None
+        self.finished = None
+        self._budget = RUN_OUTPUT_LIMIT
+
+    @property
+    def done(self):
+        return self.status in ("exited", "stopped", "error")
+
+    def write(self, text, tag=None):
+        self.output.put((text, tag))
+
+    def emit(self, text, is_stderr):
+        """on_output callback: keeps at most RUN_OUTPUT_LIMIT chars of output for this run."""
+        if self._budget <= 0:
+            return
+        if len(text) >= self._budget:
+            text = text[:self._budget] + "\n[output truncated]\n"
+        self._budget -= len(text)
+        self.write(text, "stderr" if is_stderr else None)
+
+    @property
+    def title(self):
+        return f"{self.name} #{self.id}"
+
+    def describe(self):
+        if self.status == "exited":
+            # no exit code: nothing was executed (missing toolchain, failed build, opened in a browser)
+            return "done" if self.exit_code is None else f"exit {self.exit_code}"
+        return self.status
+
+class RunManager:
+    """
+    Starts RunJobs on their own daemon threads, at most `max_parallel` at a time
+    (default: the CPU count); further starts wait in FIFO order. Stopping a queued
+    job drops it before it starts; stopping a running one kills its process group.
+    """
+
+    def __init__(self, max_parallel=None):
+        self.max_parallel = max_parallel or os.cpu_count() or 2
+        self._pending = deque()
+        self._running = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def start(self, name, target):
+        with self._lock:
+            job = RunJob(self._next_id, name, target)
+            self._next_id += 1
+            self._pending.append(job)
+        self._dispatch()
+        return job
+
+    def stop(self, job):
+        job.stop_event.set()
+        with self._lock:
+            if job.status == "queued":
+                self._pending.remove(job)
+                job.status = "stopped"
+                job.finished = time.monotonic()
+
+    @property
+    def counts(self):
+        """(running, queued)"""
+        with self._lock:
+            return self._running, len(self._pending)
+
+    def _dispatch(self):
+        with self._lock:
+            while self._pending and self._running < self.max_parallel:
+                job = self._pending.popleft()
+                job.status = "running"
+                job.started = time.monotonic()
+                self._running += 1
+                threading.Thread(target=self._run, args=(job,), name=f"run-{job.id}", daemon=True).start()
+
+    def _run(self, job):
+        status = "error"
+        try:
+            job.exit_code = job.target(job)
+            status = "exited"
+        except Exception as e:
+            job.write(f"Error: {e}\n", "stderr")
+        finally:
+            with self._lock:
+                job.status = "stopped" if job.stop_event.is_set() else status
+                job.finished = time.monotonic()
+                self._running -= 1
+            self._dispatch()
+
+# ---------------------------
+# Saving (atomic, off the Tk thread)
+# ---------------------------
+AUTOSAVE_DELAY = 1500  # ms without edits before an autosave
+
+def atomic_write(path, data, encoding="utf-8"):
+    """
+    Write `data` so that `path` is always either the old or the new file: write a
+    temp file next to it, fsync, then rename over the target (symlinks are followed).
+    """
+    path = Path(os.path.realpath(path))
+    tmp = path.with_name(f".{path.name}.{os.urandom(4).hex()}.tmp")
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except OSError:
+        mode = None
+    # created like open() would (0o666 minus umask); existing files keep their mode
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if os.name == "posix":
+        # persist the rename itself
+        try:
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+class SaveWorker:
+    """
+    Single background thread that writes buffer snapshots with atomic_write().
+    Writes run one at a time; if several snapshots of one file are queued only the
+    newest is written. Every job gets (token, path, error) back on its reply queue.
+    """
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, path, data, reply, token=None):
+        with self._idle:
+            self._pending += 1
+        self._jobs.put((Path(path), data, reply, token))
+
+    def flush(self, timeout=None):
+        """Wait until every submitted save is on disk; False if `timeout` ran out first."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _run(self):
+        while True:
+            jobs = [self._jobs.get()]
+            while True:
+                try:
+                    jobs.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            latest = {}
+            for job in jobs:
+                latest[job[0]] = job
+            for path, data, _reply, _token in latest.values():
+                try:
+                    with PROFILER.span("save"):
+                        atomic_write(path, data)
+                    error = None
+                except Exception as e:
+                    error = e
+                for job in jobs:
+                    if job[0] == path:
+                        job[2].put((job[3], path, error))
+            with self._idle:
+                self._pending -= len(jobs)
+                self._idle.notify_all()
+
+_SAVE_WORKER = None
+
+def get_save_worker():
+    global _SAVE_WORKER
+    if _SAVE_WORKER is None:
+        _SAVE_WORKER = SaveWorker()
+    return _SAVE_WORKER
+
+# ---------------------------
+# Position mapping
+# ---------------------------
+class LineIndex:
+    """
+    Maps character offsets of a buffer snapshot to Tk "line.col" indices using a
+    precomputed table of line start offsets (O(log lines) per lookup).
+    """
+
+    def __init__(self, text=None, lines=None):
+        if lines is None:
+            lines = text.split("\n")
+        # starts[i] = offset of the first char of line i (0-based)
+        self.starts = list(accumulate((len(l) + 1 for l in lines[:-1]), initial=0))
+
+    def line_of(self, pos):
+        """0-based line containing offset `pos`."""
+        return bisect_right(self.starts, pos) - 1
+
+    def offset(self, line):
+        """Offset of the start of 0-based `line`."""
+        return self.starts[line]
+
+    def index(self, pos):
+        """Tk index ("line.col", 1-based line) for offset `pos`."""
+        ln = bisect_right(self.starts, pos) - 1
+        return f"{ln + 1}.{pos - self.starts[ln]}"
+
+    def indices(self, positions):
+        """Tk indices for many offsets at once (bisects run in C via map)."""
+        starts = self.starts
+        return [f"{ln}.{pos - starts[ln - 1]}"
+                for ln, pos in zip(map(bisect_right, repeat(starts), positions), positions)]
+
+class BufferSearch:
+    """
+    Find-all over one buffer snapshot: every match offset, sorted, so next/previous
+    from any position is a bisect. Empty regex matches are ignored.
+    """
+
+    MAX_MATCHES = 200_000
+
+    def __init__(self, content, pattern, is_regex=False, ignore_case=True):
+        self.index = LineIndex(content)
+        self.starts = []
+        self.ends = []
+        if not is_regex:
+            haystack, needle = content, pattern
+            if ignore_case:
+                haystack, needle = content.lower(), pattern.lower()
+            if len(haystack) == len(content) and needle:
+                # plain text: str.find is much faster than a (case-insensitive) regex
+                pos = haystack.find(needle)
+                while pos != -1 and len(self.starts) < self.MAX_MATCHES:
+                    self.starts.append(pos)
+                    self.ends.append(pos + len(needle))
+                    pos = haystack.find(needle, pos + len(needle))
+                return
+        rx = compile_search(pattern, is_regex, ignore_case)
+        for m in rx.finditer(content):
+            if m.end() == m.start():
+                continue
+            self.starts.append(m.start())
+            self.ends.append(m.end())
+            if len(self.starts) >= self.MAX_MATCHES:
+                break
+
+    def __len__(self):
+        return len(self.starts)
+
+    def offset(self, tk_index):
+        """Buffer offset of a Tk "line.col" index."""
+        line, col = map(int, tk_index.split("."))
+        return self.index.offset(line - 1) + col
+
+    def next(self, offset):
+        """Number of the first match starting at or after `offset` (wraps around)."""
+        if not self.starts:
+            return None
+        i = bisect_left(self.starts, offset)
+        return i if i < len(self.starts) else 0
+
+    def prev(self, offset):
+        """Number of the last match starting before `offset` (wraps around)."""
+        if not self.starts:
+            return None
+        return (bisect_left(self.starts, offset) - 1) % len(self.starts)
+
+    def span(self, i):
+        return self.index.index(self.starts[i]), self.index.index(self.ends[i])
+
+    def ranges(self):
+        """Flat [start, end, start, end, ...] Tk indices of all matches."""
+        out = [None] * (2 * len(self.starts))
+        out[0::2] = self.index.indices(self.starts)
+        out[1::2] = self.index.indices(self.ends)
+        return out
+
+# ---------------------------
+# Incremental highlighting
+# ---------------------------
+SYNTAX_TAGS = ("kw", "builtin", "comment", "string", "number", "operator", "tag", "attr")
+
+# language name -> (module, lexer class); modules are imported and lexers created on
+# first use, then shared by all tabs (main.spec lists the modules for frozen builds)
+_LEXER_CLASSES = {
+    "python": ("pygments.lexers.python", "PythonLexer"),
+    "c": ("pygments.lexers.c_cpp", "CLexer"),
+    "cpp": ("pygments.lexers.c_cpp", "CppLexer"),
+    "c++": ("pygments.lexers.c_cpp", "CppLexer"),
+    "html": ("pygments.lexers.html", "HtmlLexer"),
+    "htm": ("pygments.lexers.html", "HtmlLexer"),
+    "css": ("pygments.lexers.css", "CssLexer"),
+    "javascript": ("pygments.lexers.javascript", "JavascriptLexer"),
+    "js": ("pygments.lexers.javascript", "JavascriptLexer"),
+    "typescript": ("pygments.lexers.javascript", "TypeScriptLexer"),
+    "ts": ("pygments.lexers.javascript", "TypeScriptLexer"),
+    "rust": ("pygments.lexers.rust", "RustLexer"),
+    "java": ("pygments.lexers.jvm", "JavaLexer"),
+    "lua": ("pygments.lexers.scripting", "LuaLexer"),
+    "go": ("pygments.lexers.go", "GoLexer"),
+    "csharp": ("pygments.lexers.dotnet", "CSharpLexer"),
+    "cs": ("pygments.lexers.dotnet", "CSharpLexer"),
+    "c#": ("pygments.lexers.dotnet", "CSharpLexer"),
+    "ruby": ("pygments.lexers.ruby", "RubyLexer"),
+    "rb": ("pygments.lexers.ruby", "RubyLexer"),
+    "kotlin": ("pygments.lexers.jvm", "KotlinLexer"),
+    "kt": ("pygments.lexers.jvm", "KotlinLexer"),
+    "nix": ("pygments.lexers.nix", "NixLexer"),
+} if USE_PYGMENTS else {}
+_LEXER_CACHE = {}
+_PYGMENTS_LOCK = threading.RLock()
+
+# filled in by load_pygments()
+RegexLexer = None
+Token = None
+
+def load_pygments():
+    """Import the Pygments core (RegexLexer, token types) once; safe from any thread."""
+    global RegexLexer, Token
+    with _PYGMENTS_LOCK:
+        if Token is None:
+            from pygments.lexer import RegexLexer as regex_lexer
+            from pygments.token import Token as token, STANDARD_TYPES
+            RegexLexer = regex_lexer
+            Token = token
+            TOKEN_TAGS.update((ttype, map_token_to_tag(ttype)) for ttype in STANDARD_TYPES)
+
+def get_lexer(language):
+    """Return the shared lexer instance for `language` (Python lexer if unknown)."""
+    spec = _LEXER_CLASSES.get(language.lower(), _LEXER_CLASSES.get("python"))
+    with _PYGMENTS_LOCK:
+        lexer = _LEXER_CACHE.get(spec)
+        if lexer is None:
+            load_pygments()
+            module, name = spec
+            lexer = _LEXER_CACHE[spec] = getattr(importlib.import_module(module), name)()
+    return lexer
+
+# stdlib modules startup defers; preloading only warms the import cache
+PRELOAD_MODULES = ("subprocess", "hashlib", "tempfile", "webbrowser")
+
+def preload_modules(languages):
+    """Import what startup deferred, plus the lexers for `languages` (background thread, after the first frame)."""
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    if not USE_PYGMENTS:
+        return
+    try:
+        for language in languages:
+            get_lexer(language)
+    except Exception:
+        pass  # the highlight worker reports real failures
+
+def map_token_to_tag(ttype):
+    """Map a Pygments token type to one of the editor's syntax tags (or None)."""
+    if ttype in Token.Comment or ttype in Token.Comment.Preproc:
+        return "comment"
+    if ttype in Token.Keyword:
+        return "kw"
+    if ttype in Token.Name.Builtin or ttype in Token.Name.Function or ttype in Token.Name.Class:
+        return "builtin"
+    if ttype in Token.String:
+        return "string"
+    if ttype in Token.Number:
+        return "number"
+    if ttype in Token.Operator or ttype in Token.Punctuation:
+        return "operator"
+    if ttype in Token.Name.Tag:
+        return "tag"
+    if ttype in Token.Name.Attribute:
+        return "attr"
+    return None
+
+class _TokenTagTable(dict):
+    """Memoized token type -> tag table; classifying a token is one dict lookup."""
+
+    def __missing__(self, ttype):
+        tag = self[ttype] = map_token_to_tag(ttype)
+        return tag
+
+TOKEN_TAGS = _TokenTagTable()
+# RegexScanner tokens are already tag names
+TOKEN_TAGS.update((tag, tag) for tag in SYNTAX_TAGS)
+
+ROOT_STATE = ("root",)
+
+_BRACKETS = {"(": 1, "[": 1, "{": 1, "${": 1, "#{": 1, ")": -1, "]": -1, "}": -1}
+
+def _pygments_from(lexer, text, pos=0):
+    """
+    Tokens of `text` from the line start `pos` on, lexed from the root state with the
+    lexer's public get_tokens_unprocessed(), in the protocol IncrementalHighlighter
+    resumes lexers with: (pos, ttype, value) tokens plus (pos, None, ROOT_STATE) at
+    line starts that are probably safe to restart from: outside any bracket or
+    interpolation, and inside whitespace or right after a line comment.
+    IncrementalHighlighter checks that guess.
+    """
+    text_type, line_comment = Token.Text, Token.Comment.Single
+    brackets = (Token.Punctuation, Token.Operator, Token.Literal.String.Interpol)
+    depth = 0
+    yield pos, None, ROOT_STATE
+    for start, ttype, value in lexer.get_tokens_unprocessed(text[pos:] if pos else text):
+        start += pos
+        yield start, ttype, value
+        if value in _BRACKETS and any(ttype in t for t in brackets):
+            depth = max(0, depth + _BRACKETS[value])
+        elif depth == 0 and "\n" in value:
+            if ttype in text_type:
+                nl = value.find("\n")
+                while nl >= 0:
+                    yield start + nl + 1, None, ROOT_STATE
+                    nl = value.find("\n", nl + 1)
+            elif ttype in line_comment and value.endswith("\n"):
+                yield start + len(value), None, ROOT_STATE
+
+class IncrementalHighlighter:
+    """
+    Re-lexes only the lines around an edit:
+    - restart a few lines above the first changed line, at a checkpoint where the
+      last lex was in its root state (or probably was, for Pygments, see _pygments_from)
+    - the unchanged lines up to the edit must come out as before, else restart further up
+    - stop once CONFIRM_LINES lines past the edit, starting at a checkpoint, lex
+      exactly as before
+    - restart above any unterminated comment or string within OPEN_LOOKBACK lines,
+      since the edit may close it
+    Each line keeps a signature of its tokens (column, type, length) to compare with.
+    Tk-agnostic: compute() returns the line range to re-tag and the tag ranges for it.
+    """
+
+    RESUME_CONTEXT = 4     # restart at least this many lines above the first changed line
+    CONFIRM_LINES = 20     # unchanged lines that must match before the old tokens are kept
+    OPEN_LOOKBACK = 500    # an unterminated comment or string this close above the edit
+                           # may be one the edit closes: restart above the first such line
+    OPENERS = ("/*", '"""', "'''", "<!--", '"', "'", "`")
+
+    def __init__(self, language, lexer=None):
+        self.language = language
+        self.lexer = lexer      # else resolved by the first compute(), i.e. on the worker thread
+        self.lines = []     # buffer lines at the last update
+        self.states = []    # ROOT_STATE where a line starts in the root state, else None
+        self.sigs = []      # hash of each line's tokens
+        self.open = []      # lines with an Error token or an opener the lexer left as an operator
+
+    @property
+    def resumable(self):
+        """True if the lexer can restart at a line start (else every edit re-lexes the buffer)."""
+        return isinstance(self.lexer, RegexScanner) or \
+            (RegexLexer is not None and isinstance(self.lexer, RegexLexer))
+
+    def _lex(self, text, pos):
+        if isinstance(self.lexer, RegexScanner):
+            return self.lexer.lex_from(text, pos)
+        return _pygments_from(self.lexer, text, pos)
+
+    def update(self, content):
+        """Re-lex `content` and commit the result right away (see compute())."""
+        result = self.compute(content)
+        if result is not None:
+            self.commit(result)
+        return result
+
+    def commit(self, result):
+        """Make a computed result the snapshot the next compute() diffs against."""
+        self.lines, self.states, self.sigs, self.open = result[3:7]
+
+    def compute(self, content):
+        """
+        Re-lex `content` against the last committed snapshot without changing it.
+        Returns (first, stop, ranges, lines, states, sigs, open): lines [first, stop)
+        (0-based) must be re-tagged with ranges {tag: [start, end, start, end, ...]}
+        of Tk indices; stop == len(lines) means EOF. The rest is the new snapshot
+        for commit(). Returns None if nothing changed.
+        """
+        if self.lexer is None:
+            self.lexer = get_lexer(self.language)
+        new_lines = content.split("\n")
+        old_lines, old_states = self.lines, self.states
+        n = min(len(old_lines), len(new_lines))
+        first = 0
+        while first < n and old_lines[first] == new_lines[first]:
+            first += 1
+        if first == len(old_lines) == len(new_lines):
+            return None
+        tail = 0
+        while tail < n - first and old_lines[-1 - tail] == new_lines[-1 - tail]:
+            tail += 1
+        index = LineIndex(lines=new_lines)
+        if not self.resumable or not old_states:
+            return self._relex(content, new_lines, index, 0, first, len(new_lines) - tail)
+
+        target = first - self.RESUME_CONTEXT
+        i = bisect_left(self.open, first - self.OPEN_LOOKBACK)
+        if i < len(self.open) and self.open[i] < first:
+            target = min(target, self.open[i])
+        while True:
+            resume = max(0, min(target, len(old_states) - 1, len(new_lines) - 1))
+            while resume > 0 and old_states[resume] is None:
+                resume -= 1
+            result = self._relex(content, new_lines, index, resume, first, len(new_lines) - tail)
+            if result is not None:
+                return result
+            # the lines above the edit came out differently: not a real checkpoint
+            target = resume - 4 * (first - resume)
+
+    def _relex(self, content, lines, index, resume, first, changed_end):
+        """compute() from line `resume`; None if the unchanged lines before `first` do not match."""
+        old_states, old_sigs = self.states, self.sigs
+        n_lines = len(lines)
+        delta = n_lines - len(self.lines)
+
+        def end_of(ln):
+            return index.offset(ln + 1) if ln + 1 < n_lines else len(content) + 1
+        states, sigs, open_lines, spans = [], [], [], []
+        error_type = Token.Error if Token is not None else None
+        operator, punctuation = (Token.Operator, Token.Punctuation) if Token is not None else ((), ())
+        openers = self.OPENERS
+        line, line_start, line_end = resume, index.offset(resume), end_of(resume)
+        checkpoint, acc = None, []
+        stop, match_from = n_lines, None
+
+        def settle(upto):
+            """Close lines [line, upto); False to abort, True once the old tokens can be kept."""
+            nonlocal line, checkpoint, acc, match_from, stop
+            while line < upto:
+                sig = hash(tuple(acc))
+                states.append(checkpoint)
+                sigs.append(sig)
+                if line < first:
+                    if resume and (checkpoint != old_states[line] or sig != old_sigs[line]):
+                        return False
+                elif line >= changed_end and line > resume:
+                    old = line - delta
+                    if 0 <= old < len(old_states) and checkpoint == old_states[old] and sig == old_sigs[old]:
+                        if match_from is None and checkpoint is not None:
+                            match_from = line
+                        if match_from is not None and line - match_from + 1 >= self.CONFIRM_LINES:
+                            stop = match_from
+                            return True
+                    else:
+                        match_from = None
+                line += 1
+                checkpoint, acc = None, []
+            return None
+
+        for pos, ttype, value in self._lex(content, index.offset(resume)):
+            if pos >= line_end and line < n_lines - 1:
+                done = settle(index.line_of(pos))
+                if done is not None:
+                    break
+                line_start, line_end = index.offset(line), end_of(line)
+            if ttype is None:
+                if pos == line_start:
+                    checkpoint = value
+                continue
+            if not value:
+                continue
+            end = pos + len(value)
+            # a token running into the next lines keeps no length: it may grow or shrink below
+            acc.append((pos - line_start, ttype, end - pos if end < line_end else -1))
+            tag = TOKEN_TAGS[ttype]
+            if tag:
+                spans.append((pos, end, tag))
+            if (ttype is error_type or content.startswith(openers, pos)
+                    and (ttype in operator or ttype in punctuation)) and (not open_lines or open_lines[-1] != line):
+                open_lines.append(line)
+        else:
+            done = settle(n_lines)
+        if done is False:
+            return None
+        if match_from is not None and stop == n_lines and done is None:
+            stop = match_from if match_from < n_lines else n_lines
+
+        limit = index.offset(stop) if stop < n_lines else len(content)
+        ranges = {}
+        for start, end, tag in spans:
+            if start < limit:
+                ranges.setdefault(tag, []).extend((index.index(start), index.index(end)))
+        count = stop - resume
+        states = self.states[:resume] + states[:count]
+        sigs = self.sigs[:resume] + sigs[:count]
+        open_lines = self.open[:bisect_left(self.open, resume)] + [ln for ln in open_lines if ln < stop]
+        if stop < n_lines:
+            states += self.states[stop - delta:]
+            sigs += self.sigs[stop - delta:]
+            open_lines += [ln + delta for ln in self.open[bisect_left(self.open, stop - delta):]]
+        return resume, stop, ranges, lines, states, sigs, open_lines
+
+class HighlightWorker:
+    """
+    Single background thread that lexes buffer snapshots for every tab, so typing
+    never waits on the lexer. Jobs carry a generation number; only the newest
+    queued job per tab is lexed and results go back through the tab's reply queue.
+    """
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, highlighter, generation, content, reply):
+        self._jobs.put((highlighter, generation, content, reply))
+
+    def _run(self):
+        while True:
+            jobs = [self._jobs.get()]
+            while True:
+                try:
+                    jobs.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            # older snapshots of the same buffer are stale already
+            latest = {}
+            for job in jobs:
+                latest[id(job[3])] = job
+            PROFILER.count("lex.coalesced", len(jobs) - len(latest))
+            for highlighter, generation, content, reply in latest.values():
+                try:
+                    with PROFILER.span("lex"):
+                        result = highlighter.compute(content)
+                except Exception as e:
+                    result = e
+                reply.put((highlighter, generation, result))
+
+_HIGHLIGHT_WORKER = None
+
+def get_highlight_worker():
+    global _HIGHLIGHT_WORKER
+    if _HIGHLIGHT_WORKER is None:
+        _HIGHLIGHT_WORKER = HighlightWorker()
+    return _HIGHLIGHT_WORKER
+
+# ---------------------------
+# Regex scanner (highlighting without Pygments)
+# ---------------------------
+class RegexScanner:
+    """
+    All of a language's rules compiled once into one alternation of named groups:
+    a single finditer() pass classifies every span, and the rule that matches
+    first wins, so keywords inside strings and comments are not tagged.
+    lex_from() speaks the protocol IncrementalHighlighter resumes lexers with.
+    """
+    ROOT = ROOT_STATE
+
+    def __init__(self, rules):
+        self.tags = {"skip": None}
+        parts = []
+        for i, (tag, pattern) in enumerate(rules):
+            self.tags[f"r{i}"] = tag
+            parts.append(f"(?P<r{i}>{pattern})")
+        # Only try the rules at non-blank characters, and swallow untagged words whole
+        # instead of retrying every rule at each of their letters. Rules that start
+        # with a word character must therefore start at a word boundary.
+        self.regex = re.compile(r"(?=\S)(?:" + "|".join(parts) + r"|(?P<skip>\w+))", re.M)
+
+    def scan(self, text, pos=0):
+        """Yield (start, end, tag) for every highlighted span from `pos` on."""
+        tags = self.tags
+        for m in self.regex.finditer(text, pos):
+            tag = tags[m.lastgroup]
+            if tag:
+                yield m.start(), m.end(), tag
+
+    def lex_from(self, text, pos=0):
+        """
+        Like _pygments_from(): (pos, tag, value) tokens plus (pos, None, ROOT) at every
+        line start outside a token. Between tokens the scanner has no state, and its
+        multi-line rules run to \Z when unterminated (see _SCANNER_RULES), so any such
+        line start is a safe place to resume from.
+        """
+        root = self.ROOT
+        tags = self.tags
+        find = text.find
+        if pos == 0 or text[pos - 1] == "\n":
+            line = pos
+        else:
+            nl = find("\n", pos)
+            line = nl + 1 if nl >= 0 else -1
+        for m in self.regex.finditer(text, pos):
+            start, end = m.span()
+            while 0 <= line <= start:
+                yield line, None, root
+                nl = find("\n", line)
+                line = nl + 1 if nl >= 0 else -1
+            tag = tags[m.lastgroup]
+            if tag:
+                yield start, tag, m.group()
+            if line >= 0 and line < end:
+                # line starts inside a multi-line token are not checkpoints
+                nl = end if text[end - 1] == "\n" else find("\n", end) + 1
+                line = nl if nl > 0 else -1
+        while line >= 0:
+            yield line, None, root
+            nl = find("\n", line)
+            line = nl + 1 if nl >= 0 else -1
+
+def _keywords(words):
+    return r"\b(?:" + "|".join(words.split()) + r")\b"
+
+_DQ_STRING = r'"(?:[^"\\\n]|\\.)*"'
+_SQ_STRING = r"'(?:[^'\\\n]|\\.)*'"
+_C_COMMENTS = [("comment", r"//[^\n]*"), ("comment", r"/\*[\s\S]*?(?:\*/|\Z)")]
+
+# language -> [(tag, pattern)], earlier rules win where matches start at the same place.
+# A rule that can span lines must also match when unterminated, up to \Z: then where
+# it starts never depends on text further down, which RegexScanner.lex_from() relies on.
+_SCANNER_RULES = {
+    "python": [
+        ("comment", r"#[^\n]*"),
+        ("string", r'"""[\s\S]*?(?:"""|\Z)'),
+        ("string", r"'''[\s\S]*?(?:'''|\Z)"),
+        ("string", _DQ_STRING),
+        ("string", _SQ_STRING),
+        ("kw", _keywords("def class if else elif for while try except finally with as import from return "
+                         "in is and or not lambda pass break continue yield global nonlocal assert del")),
+    ],
+    "c-family": _C_COMMENTS + [
+        ("string", _DQ_STRING),
+        ("string", r"'(?:\\[^'\n]*|[^'\\\n])'"),  # char literal; leaves Rust lifetimes alone
+        ("kw", _keywords("int char float double void if else for while do switch case break continue return "
+                         "struct typedef enum const static extern sizeof class public private protected using "
+                         "namespace package import func let var impl trait fn match mod println string bool "
+                         "interface virtual override sealed abstract readonly async await fun val suspend "
+                         "companion object init constructor internal open final data get set")),
+    ],
+    "ruby": [
+        ("comment", r"#[^\n]*"),
+        ("string", r'"""[\s\S]*?(?:"""|\Z)'),
+        ("string", r"'''[\s\S]*?(?:'''|\Z)"),
+        ("string", _DQ_STRING),
+        ("string", _SQ_STRING),
+        ("string", r"%[qQ]?\{[\s\S]*?(?:\}|\Z)|%[qQ]?\[[\s\S]*?(?:\]|\Z)"),
+        ("kw", _keywords("def class if else elsif end unless case when while until for in do module begin "
+                         "rescue ensure yield return super self nil true false and or not alias undef BEGIN END")),
+    ],
+    "nix": [
+        ("comment", r"#[^\n]*"),
+        ("comment", r"/\*[\s\S]*?(?:\*/|\Z)"),
+        ("string", r'"(?:[^"\\]|\\[\s\S])*(?:"|\Z)'),
+        ("string", r"''[\s\S]*?(?:''|\Z)"),
+        ("kw", _keywords("let in rec with inherit or import importall builtins null true false mkDerivation "
+                         "mkShell fetchFromGitHub stdenv lib pkgs")),
+    ],
+    "html": [
+        ("comment", r"<!--[\s\S]*?(?:-->|\Z)"),
+        ("tag", r"</?[A-Za-z][\w:.-]*(?:[ \t]*/?>)?|/?>"),  # "<title>" is one span
+        ("attr", r"[\w:-]+(?==)"),
+        ("string", r"(?<==)\"[^\"]*(?:\"|\Z)|(?<==)'[^']*(?:'|\Z)"),
+    ],
+    "css": [
+        ("comment", r"/\*[\s\S]*?(?:\*/|\Z)"),
+        ("string", _DQ_STRING),
+        ("string", _SQ_STRING),
+    ],
+    "javascript": _C_COMMENTS + [
+        ("string", _DQ_STRING),
+        ("string", _SQ_STRING),
+        ("string", r"`(?:[^`\\]|\\[\s\S])*(?:`|\Z)"),
+        ("kw", _keywords("function var let const if else for while return new this class extends constructor "
+                         "import from export await async console print")),
+    ],
+    "lua": [
+        ("comment", r"--\[\[[\s\S]*?(?:\]\]|\Z)"),
+        ("comment", r"--[^\n]*"),
+        ("string", r"\[\[[\s\S]*?(?:\]\]|\Z)"),
+        ("string", _DQ_STRING),
+        ("string", _SQ_STRING),
+        ("kw", _keywords("and break do else elseif end false for function goto if in local nil not or repeat "
+                         "return then true until while")),
+    ],
+}
+_SCANNER_ALIASES = {
+    "c": "c-family", "cpp": "c-family", "c++": "c-family", "rust": "c-family", "java": "c-family",
+    "go": "c-family", "csharp": "c-family", "cs": "c-family", "c#": "c-family", "kotlin": "c-family",
+    "kt": "c-family", "rb": "ruby", "htm": "html", "js": "javascript", "typescript": "javascript",
+    "ts": "javascript",
+}
+_SCANNERS = {}
+
+def get_scanner(language):
+    """Shared compiled RegexScanner for `language`, or None if it has no rules."""
+    name = _SCANNER_ALIASES.get(language.lower(), language.lower())
+    if name not in _SCANNER_RULES:
+        return None
+    scanner = _SCANNERS.get(name)
+    if scanner is None:
+        scanner = _SCANNERS[name] = RegexScanner(_SCANNER_RULES[name])
+    return scanner
+
+# ---------------------------
+# Symbols (outline, go to symbol)
+# ---------------------------
+_MODIFIERS = r"(?:(?:public|private|protected|internal|static|final|abstract|sealed|partial|open|data|" \
+             r"inner|enum|annotation|readonly|unsafe|new|override|virtual|async|synchronized|native|" \
+             r"extern|default|suspend|inline|operator|infix|tailrec|external)[ \t]+)"
+
+# language -> [(kind, pattern)]. Patterns match within one line, capture the name in
+# (?P<name>...) and may capture a more precise kind in (?P<kind>...).
+_SYMBOL_RULES = {
+    "python": [
+        ("class", r"^[ \t]*class[ \t]+(?P<name>\w+)"),
+        ("function", r"^[ \t]*(?:async[ \t]+)?def[ \t]+(?P<name>\w+)"),
+    ],
+    "c": [
+        ("struct", r"^[ \t]*(?:typedef[ \t]+)?(?:template[ \t]*<[^>\n]*>[ \t]*)?"
+                   r"(?P<kind>struct|class|union|enum|namespace)(?:[ \t]+class)?[ \t]+(?P<name>\w+)(?=[ \t]*(?:[{:]|$))"),
+        # definitions start in column 0; the parameter list is followed by "{", the end
+        # of the line or continues on the next one (a ";" would make it a prototype)
+        ("function", r"^(?!(?:if|for|while|switch|return|else|do|typedef|struct|class|union|enum)\b)"
+                     r"[A-Za-z_][\w \t\*&:<>,]*?[ \t\*&](?P<name>~?[A-Za-z_][\w:~]*)[ \t]*"
+                     r"\((?:[^)\n]*\)[ \t]*(?:(?:const|noexcept|override)\b[ \t]*)*(?:\{|$)|[^)\n]*$)"),
+    ],
+    "rust": [
+        ("function", r"^[ \t]*(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:(?:async|const|unsafe|extern(?:[ \t]+\"[^\"\n]*\")?)[ \t]+)*"
+                     r"fn[ \t]+(?P<name>\w+)"),
+        ("struct", r"^[ \t]*(?:pub(?:\([^)\n]*\))?[ \t]+)?(?P<kind>struct|enum|trait|mod|union|type)[ \t]+(?P<name>\w+)"),
+        ("impl", r"^[ \t]*(?:unsafe[ \t]+)?impl\b(?:[ \t]*<[^>\n]*>)?[ \t]+(?P<name>[^{\s][^{\n]*?)[ \t]*(?:\{|where\b|$)"),
+        ("macro", r"^[ \t]*macro_rules![ \t]*(?P<name>\w+)"),
+    ],
+    "go": [
+        ("function", r"^func[ \t]+(?:\([^)\n]*\)[ \t]*)?(?P<name>\w+)"),
+        ("type", r"^[ \t]*(?:type[ \t]+)?(?P<name>[A-Za-z_]\w*)[ \t]+(?P<kind>struct|interface)[ \t]*\{"),
+    ],
+    "java": [  # also C# and Kotlin
+        ("class", r"^[ \t]*" + _MODIFIERS + r"*(?P<kind>class|interface|enum|struct|record|object)[ \t]+(?P<name>\w+)"),
+        ("function", r"^[ \t]*" + _MODIFIERS + r"*fun[ \t]+(?:<[^>\n]*>[ \t]*)?(?:[^\s(]+\.)?(?P<name>\w+)"),
+        ("method", r"^[ \t]+" + _MODIFIERS + r"+(?!class\b|interface\b|enum\b|struct\b|record\b|fun\b)"
+                   r"[\w<>\[\],.? \t]*?[\w>\]?][ \t]+(?P<name>\w+)[ \t]*"
+                   r"\((?:[^)\n]*\)[ \t]*(?:throws\b[^{;\n]*)?(?:\{|$)|[^)\n]*$)"),
+    ],
+    "javascript": [  # also TypeScript
+        ("function", r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:async[ \t]+)?function\*?[ \t]*(?P<name>[\w$]+)"),
+        ("class", r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:abstract[ \t]+)?class[ \t]+(?P<name>[\w$]+)"),
+        ("type", r"^[ \t]*(?:export[ \t]+)?(?:declare[ \t]+)?(?P<kind>interface|enum|namespace|type)[ \t]+(?P<name>[\w$]+)"),
+        ("function", r"^[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+(?P<name>[\w$]+)[ \t]*(?::[^=\n]*)?=[ \t]*"
+                     r"(?:async[ \t]+)?(?:function\b|\([^)\n]*\)[^=\n]*=>|[\w$]+[ \t]*=>)"),
+        ("method", r"^[ \t]+(?:(?:static|async|get|set|public|private|protected|readonly|override)[ \t]+)*"
+                   r"(?!(?:if|for|while|switch|catch|with|return|function|else)\b)(?P<name>[\w$]+)[ \t]*"
+                   r"\([^)\n]*\)[ \t]*(?::[^{\n]*)?\{"),
+    ],
+    "lua": [
+        ("function", r"^[ \t]*(?:local[ \t]+)?function[ \t]+(?P<name>[\w.:]+)"),
+        ("function", r"^[ \t]*(?:local[ \t]+)?(?P<name>[\w.]+)[ \t]*=[ \t]*function\b"),
+    ],
+    "ruby": [
+        ("method", r"^[ \t]*def[ \t]+(?P<name>(?:self\.)?\w+[?!=]?)"),
+        ("class", r"^[ \t]*(?P<kind>class|module)[ \t]+(?P<name>[\w:]+)"),
+    ],
+    "css": [
+        ("at-rule", r"^[ \t]*(?P<name>@[\w-]+[^{;\n]*?)[ \t]*\{"),
+        ("rule", r"^[ \t]*(?P<name>[^\s{}/@][^{};\n]*?)[ \t]*\{"),
+    ],
+    "html": [
+        ("heading", r"<(?P<kind>h[1-6])\b[^>\n]*>[ \t]*(?P<name>[^<\n]*[^<\s])"),
+        ("id", r"<\w+\b[^>\n]*?\bid=[\"'](?P<name>[^\"'\n]+)"),
+    ],
+    "nix": [
+        ("attribute", r"^[ \t]{0,2}(?P<name>[A-Za-z_][\w'.-]*)[ \t]*=(?!=)"),
+    ],
+}
+_SYMBOL_ALIASES = {
+    "cpp": "c", "c++": "c", "csharp": "java", "cs": "java", "c#": "java", "kotlin": "java", "kt": "java",
+    "js": "javascript", "typescript": "javascript", "ts": "javascript", "rb": "ruby", "htm": "html",
+}
+_SYMBOL_EXTRACTORS = {}
+
+class SymbolExtractor:
+    """
+    A language's symbol rules compiled into one multi-line alternation (like
+    RegexScanner), so a buffer is searched for definitions in one pass.
+    """
+
+    def __init__(self, rules):
+        parts = []
+        self.rules = {}
+        for i, (kind, pattern) in enumerate(rules):
+            pattern = pattern.replace("(?P<name>", f"(?P<n{i}>").replace("(?P<kind>", f"(?P<t{i}>")
+            parts.append(f"(?P<r{i}>{pattern})")
+            self.rules[f"r{i}"] = (kind, f"n{i}", f"t{i}" if f"(?P<t{i}>" in pattern else None)
+        self.regex = re.compile("|".join(parts), re.M)
+
+    def extract(self, text, first_line=1):
+        """[(line, col, kind, name, indent)] for `text`, whose first line is line `first_line` (1-based)."""
+        symbols = []
+        index = None
+        for m in self.regex.finditer(text):
+            kind, name_group, kind_group = self.rules[m.lastgroup]
+            if kind_group and m.group(kind_group):
+                kind = m.group(kind_group)
+            if index is None:
+                index = LineIndex(text)
+            start = m.start(name_group)
+            ln = index.line_of(start)
+            line_start = index.offset(ln)
+            line_text = text[line_start:start]
+            indent = len(line_text) - len(line_text.lstrip())
+            symbols.append((first_line + ln, start - line_start, kind, m.group(name_group), indent))
+        return symbols
+
+def get_symbol_extractor(language):
+    """Shared SymbolExtractor for `language`, or None if it has no symbol rules."""
+    name = _SYMBOL_ALIASES.get(language.lower(), language.lower())
+    if name not in _SYMBOL_RULES:
+        return None
+    extractor = _SYMBOL_EXTRACTORS.get(name)
+    if extractor is None:
+        extractor = _SYMBOL_EXTRACTORS[name] = SymbolExtractor(_SYMBOL_RULES[name])
+    return extractor
+
+class DocumentOutline:
+    """
+    The symbols of one buffer. Symbol rules never span lines, so after an edit
+    only the changed lines are searched again and the symbols below them are
+    shifted. Same compute()/commit() protocol as IncrementalHighlighter, so it
+    runs on the HighlightWorker.
+    """
+
+    def __init__(self, language):
+        self.language = language
+        self.extractor = get_symbol_extractor(language)
+        self.lines = []
+        self.symbols = []   # [(line, col, kind, name, indent)] sorted by position
+
+    def compute(self, content):
+        """(symbols, lines) for `content`, or None if no line changed."""
+        new_lines = content.split("\n")
+        old_lines = self.lines
+        n = min(len(old_lines), len(new_lines))
+        first = 0
+        while first < n and old_lines[first] == new_lines[first]:
+            first += 1
+        if first == len(old_lines) == len(new_lines):
+            return None
+        tail = 0
+        while tail < n - first and old_lines[-1 - tail] == new_lines[-1 - tail]:
+            tail += 1
+        if self.extractor is None:
+            return [], new_lines
+        delta = len(new_lines) - len(old_lines)
+        old_end = len(old_lines) - tail
+        before = self.symbols[:bisect_left(self.symbols, (first + 1,))]
+        changed = self.extractor.extract("\n".join(new_lines[first:len(new_lines) - tail]), first + 1)
+        after = self.symbols[bisect_left(self.symbols, (old_end + 1,)):]
+        if delta:
+            after = [(line + delta, *rest) for line, *rest in after]
+        return before + changed + after, new_lines
+
+    def commit(self, result):
+        self.symbols, self.lines = result
+
+    def update(self, content):
+        result = self.compute(content)
+        if result is not None:
+            self.commit(result)
+        return self.symbols
+
+SYMBOL_MAX_FILE_SIZE = 2 * 1024 * 1024  # larger files are left out of the workspace symbol index
+
+def extract_file_symbols(path, language):
+    """Symbols of the file at `path` ([] if unreadable, binary or over SYMBOL_MAX_FILE_SIZE)."""
+    try:
+        if os.path.getsize(path) > SYMBOL_MAX_FILE_SIZE:
+            return []
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    if b"\0" in data[:8192]:
+        return []
+    return get_symbol_extractor(language).extract(data.decode("utf-8", errors="replace"))
+
+class SymbolIndex:
+    """
+    Workspace-wide symbol table in SQLite (one database per workspace in the user
+    cache folder), so "go to symbol" answers from an index instead of reading files.
+    - one background thread owns the writing connection: the first refresh()
+      extracts every source file, later ones only files whose mtime or size changed
+    - search() runs on the caller's thread with its own connection; WAL mode keeps
+      readers from waiting on the writer
+    """
+
+    VERSION = 1         # bump when the schema or the symbol rules change
+    BATCH = 200         # files per write transaction
+
+    def __init__(self, root, ignore_patterns=None):
+        self.root = str(root)
+        self._ignored = compile_ignore(ignore_patterns if ignore_patterns is not None else WORKSPACE_IGNORE)
+        import hashlib
+        key = hashlib.sha1(os.path.abspath(self.root).encode("utf-8")).hexdigest()[:16]
+        self.db_path = user_cache_dir() / "index" / f"{key}.symbols.sqlite3"
+        self.ready = False
+        self.files_indexed = 0
+        self._jobs = queue.Queue()
+        self._closed = threading.Event()
+        self._reader = None
+
+    def _connect(self):
+        import sqlite3
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self, conn):
+        if conn.execute("PRAGMA user_version").fetchone()[0] != self.VERSION:
+            conn.executescript("""
+                DROP TABLE IF EXISTS files;
+                DROP TABLE IF EXISTS symbols;
+                CREATE TABLE files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER);
+                CREATE TABLE symbols (path TEXT, name TEXT, lname TEXT, kind TEXT, line INTEGER, col INTEGER);
+                CREATE INDEX symbols_lname ON symbols (lname);
+                CREATE INDEX symbols_path ON symbols (path);
+            """)
+            conn.execute(f"PRAGMA user_version={self.VERSION}")
+            conn.commit()
+
+    # -- building (background thread) ------------------------------------------
+    def start(self):
+        """Start the writer thread with a full refresh."""
+        threading.Thread(target=self._run, daemon=True).start()
+        self._jobs.put(None)
+
+    def update_paths(self, paths):
+        """Re-extract `paths` (e.g. just saved) on the writer thread; paths outside the workspace are ignored."""
+        prefix = os.path.join(self.root, "")
+        paths = [p for p in map(os.path.abspath, paths) if p.startswith(prefix)]
+        if paths:
+            self._jobs.put(paths)
+
+    def close(self):
+        self._closed.set()
+        self._jobs.put(False)
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _run(self):
+        try:
+            conn = self._connect()
+            self._create_schema(conn)
+        except Exception:
+            return  # no index: go to symbol falls back to open tabs
+        try:
+            while True:
+                job = self._jobs.get()
+                if self._closed.is_set():
+                    return
+                try:
+                    if job is None:
+                        self.refresh(conn)
+                    else:
+                        self._index_files(conn, job)
+                except Exception:
+                    pass  # e.g. the disk is full; the next refresh tries again
+        finally:
+            conn.close()
+
+    def refresh(self, conn):
+        """Bring the database up to date with the files on disk."""
+        known = {p: (m, s) for p, m, s in conn.execute("SELECT path, mtime_ns, size FROM files")}
+        self.ready = bool(known)  # a saved index answers queries while it is refreshed
+        seen, changed = set(), []
+        for path in iter_workspace_files(self.root, self._ignored):
+            if os.path.splitext(path)[1].lower().lstrip(".") not in EXT_LANG:
+                continue
+            seen.add(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) != (st.st_mtime_ns, st.st_size):
+                changed.append(path)
+        gone = [p for p in known if p not in seen]
+        with conn:
+            conn.executemany("DELETE FROM symbols WHERE path = ?", ((p,) for p in gone))
+            conn.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in gone))
+        for i in range(0, len(changed), self.BATCH):
+            if self._closed.is_set():
+                return
+            self._index_files(conn, changed[i:i + self.BATCH])
+        self.files_indexed = len(seen)
+        self.ready = True
+
+    def _index_files(self, conn, paths):
+        rows, files = [], []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                files.append((path, None))
+                continue
+            language = EXT_LANG.get(os.path.splitext(path)[1].lower().lstrip("."))
+            if language is None:
+                continue
+            files.append((path, (st.st_mtime_ns, st.st_size)))
+            rows.extend((path, name, name.lower(), kind, line, col)
+                        for line, col, kind, name, _indent in extract_file_symbols(path, language))
+        with conn:
+            conn.executemany("DELETE FROM symbols WHERE path = ?", ((p,) for p, _ in files))
+            conn.executemany("DELETE FROM files WHERE path = ?", ((p,) for p, st in files if st is None))
+            conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                             ((p, st[0], st[1]) for p, st in files if st is not None))
+            conn.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    # -- searching --------------------------------------------------------------
+    def search(self, query, limit=50):
+        """
+        [(name, kind, path, line, col)]: names starting with `query` (an index range
+        scan), then names containing it, case-insensitive.
+        """
+        q = query.strip().lower()
+        if not q:
+            return []
+        if self._reader is None:
+            try:
+                self._reader = self._connect()
+            except Exception:
+                return []
+        import sqlite3
+        try:
+            rows = self._reader.execute(
+                "SELECT name, kind, path, line, col FROM symbols WHERE lname >= ? AND lname < ? "
+                "ORDER BY lname LIMIT ?", (q, q + "\uffff", limit)).fetchall()
+            if len(rows) < limit:
+                rows += self._reader.execute(
+                    "SELECT name, kind, path, line, col FROM symbols WHERE instr(lname, ?) > 1 LIMIT ?",
+                    (q, limit - len(rows))).fetchall()
+        except sqlite3.Error:
+            return []  # schema not created yet
+        return rows
+
+# ---------------------------
+# Word completion
+# ---------------------------
+WORD_RE = re.compile(r"[^\W\d]\w{2,}")   # identifiers worth completing (3+ characters)
+COMPLETION_MAX_FILE_SIZE = 1024 * 1024   # larger workspace files are not read for completion words
+
+class _TrieNode:
+    __slots__ = ("prefix", "children", "bucket", "count", "top")
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.children = None   # inner node: char -> _TrieNode
+        self.bucket = {}       # leaf: word -> count (None once burst into an inner node)
+        self.count = 0         # inner node: occurrences of `prefix` itself
+        self.top = None        # inner node: cached (-count, word) of its TOP most frequent words
+
+class CompletionTrie:
+    """
+    Identifier -> occurrence count as a burst trie: inner nodes branch on one
+    character, leaves are small {word: count} buckets that split into an inner node
+    once they hold more than BURST words. Inner nodes cache their TOP most frequent
+    words, built lazily from their children's; a count change only clears the
+    caches on that word's path, so a lookup never walks a whole subtree.
+    """
+
+    BURST = 64
+    TOP = 16    # most completions one lookup can return
+
+    def __init__(self):
+        self.root = _TrieNode("")
+        self.words = 0   # distinct words with a positive count
+
+    def add(self, word, n=1):
+        """Change the count of `word` by n (negative to remove occurrences)."""
+        node = self.root
+        depth = 0
+        while node.children is not None:
+            node.top = None
+            if depth == len(word):
+                before = node.count
+                node.count = max(0, before + n)
+                self.words += (node.count > 0) - (before > 0)
+                return
+            child = node.children.get(word[depth])
+            if child is None:
+                if n <= 0:
+                    return
+                child = node.children[word[depth]] = _TrieNode(word[:depth + 1])
+            node = child
+            depth += 1
+        bucket = node.bucket
+        before = bucket.get(word, 0)
+        count = before + n
+        if count > 0:
+            bucket[word] = count
+        elif before:
+            del bucket[word]
+        self.words += (count > 0) - (before > 0)
+        if len(bucket) > self.BURST:
+            self._burst(node)
+
+    def update(self, counts):
+        """add() every (word, n) of a mapping such as a Counter."""
+        add = self.add
+        for word, n in counts.items():
+            if n:
+                add(word, n)
+
+    def _burst(self, node):
+        depth = len(node.prefix)
+        bucket, node.bucket, node.children = node.bucket, None, {}
+        for word, count in bucket.items():
+            if len(word) == depth:
+                node.count = count
+                continue
+            child = node.children.get(word[depth])
+            if child is None:
+                child = node.children[word[depth]] = _TrieNode(word[:depth + 1])
+            child.bucket[word] = count
+        for child in node.children.values():
+            if len(child.bucket) > self.BURST:
+                self._burst(child)
+
+    def _top(self, node):
+        if node.children is None:
+            return heapq.nsmallest(self.TOP, [(-c, w) for w, c in node.bucket.items()])
+        if node.top is None:
+            items = [(-node.count, node.prefix)] if node.count else []
+            for child in node.children.values():
+                items.extend(self._top(child))
+            node.top = heapq.nsmallest(self.TOP, items)
+        return node.top
+
+    def complete(self, prefix, limit=10):
+        """[(word, count)] for words starting with `prefix`, most frequent first (at most TOP)."""
+        node = self.root
+        depth = 0
+        while node.children is not None and depth < len(prefix):
+            node = node.children.get(prefix[depth])
+            if node is None:
+                return []
+            depth += 1
+        if node.children is None:
+            found = heapq.nsmallest(limit, [(-c, w) for w, c in node.bucket.items() if w.startswith(prefix)])
+        else:
+            found = self._top(node)[:limit]
+        return [(w, -c) for c, w in found]
+
+class BufferWords:
+    """
+    The identifiers of one buffer, kept per line so an edit only re-reads the lines
+    it touched; the net change in counts goes into a CompletionTrie shared by all tabs.
+    """
+
+    def __init__(self, trie):
+        self.trie = trie
+        self.lines = [()]   # an empty buffer has one (empty) line
+
+    def replace_lines(self, first, last, texts):
+        """Lines first..last (1-based, inclusive, numbered before the edit) now read `texts`."""
+        new = [tuple(WORD_RE.findall(t)) for t in texts]
+        delta = Counter(chain.from_iterable(new))
+        delta.subtract(chain.from_iterable(self.lines[first - 1:last]))
+        self.lines[first - 1:last] = new
+        self.trie.update(delta)
+
+    def clear(self):
+        self.replace_lines(1, len(self.lines), [""])
+
+def build_workspace_words(root, ignored=None, stop=None):
+    """CompletionTrie of the identifiers in the workspace's source files (runs on a background thread)."""
+    counts = Counter()
+    for path in iter_workspace_files(root, ignored):
+        if stop is not None and stop.is_set():
+            break
+        if os.path.splitext(path)[1].lower().lstrip(".") not in EXT_LANG:
+            continue
+        try:
+            if os.path.getsize(path) > COMPLETION_MAX_FILE_SIZE:
+                continue
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                counts.update(WORD_RE.findall(f.read()))
+        except OSError:
+            continue
+    trie = CompletionTrie()
+    trie.update(counts)
+    trie.complete("")  # fill every node's cache here instead of on the first keystroke
+    return trie
+
 # ---------------------------
 # Editor Tab class
 # ---------------------------
@@ -77,11 +2281,15 @@ class EditorTab:
         self.filepath = Path(filepath) if filepath else None
         self.language = language.lower()
         self.title = title
+        self.large_file = False
+        self.highlight_enabled = self.language != "text"  # "text": plain text, never highlighted
+        self.readonly = False
 
-        # Left: linenumbers, Center: text
-        self.linenumbers = tk.Text(self.frame, width=4, padx=4, takefocus=0, border=0,
-                                   background="#333333", foreground="#bbb", state="disabled", wrap="none")
+        # Left: linenumbers (canvas gutter, only visible lines are drawn), Center: text
+        self.linenumbers = tk.Canvas(self.frame, width=40, takefocus=0, borderwidth=0,
+                                     highlightthickness=0, background="#333333")
         self.linenumbers.pack(side="left", fill="y")
+        self._gutter_state = None
 
         self.text = tk.Text(self.frame, wrap="none", undo=True, autoseparators=True, maxundo=-1)
         self.text.pack(side="left", fill="both", expand=True)
@@ -90,7 +2298,6 @@ class EditorTab:
         self.vbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_vscroll)
         self.vbar.pack(side="right", fill="y")
         self.text.config(yscrollcommand=self._on_textscroll)
-        self.linenumbers.config(yscrollcommand=self._on_textscroll_ln)
 
         self.hbar = ttk.Scrollbar(self.frame, orient="horizontal", command=self.text.xview)
         self.hbar.pack(side="bottom", fill="x")
@@ -100,13 +2307,18 @@ class EditorTab:
         self._setup_tags()
 
         # Keybindings: editing helpers
-        self.text.bind("<KeyRelease>", self.on_key_release)
+        self.text.bind("<<Modified>>", self._on_modified)
         self.text.bind("<Return>", self.on_return_key)
         self.text.bind("<Tab>", self.on_tab_key)
         self.text.bind("<BackSpace>", self.on_backspace)
         self.text.bind("<Control-slash>", self.toggle_comment)
         self.text.bind("<Configure>", lambda e: self.update_linenumbers())
         self.text.bind("<Button-1>", lambda e: self.schedule_update())
+        self.text.bind("<Button-1>", self.hide_completion, add=True)
+        # Completion popup keys (fall through to the default bindings while it is hidden)
+        self.text.bind("<Up>", lambda e: self._completion_move(-1))
+        self.text.bind("<Down>", lambda e: self._completion_move(1))
+        self.text.bind("<Escape>", self.hide_completion)
         # Mouse wheels
         self.text.bind("<MouseWheel>", lambda e: self._on_mousewheel(e))
         self.text.bind("<Button-4>", lambda e: self._on_mousewheel(e))
@@ -115,17 +2327,53 @@ class EditorTab:
         # Autopairs: intercept keypress (before default insertion)
         self.text.bind("<KeyPress>", self._on_keypress, add=True)
 
+        # Edit events: every real insert/delete/replace is reported as (start, end, inserted_length)
+        self._change_listeners = []
+        self._edit_count = 0  # bumped by every reported edit; keys outline, save and search staleness
+        self._install_edit_proxy()
+
         # Trackers for delayed updates
         self._highlight_after_id = None
         self._update_ln_after_id = None
+        # Incremental highlighter (created lazily per language)
+        self._highlighter = None
+        self._highlighter_lang = None
+        # Background highlighting: results for older generations are dropped
+        self._highlight_gen = 0
+        self._highlight_submitted = None
+        self._highlight_results = queue.Queue()
+        self._highlight_poll_id = None
+        # Outline: symbols found on the HighlightWorker, searching only lines changed since the last pass
+        self.symbols = []
+        self._outline = None
+        self._outline_after_id = None
+        self._outline_submitted = None
+        self._outline_results = queue.Queue()
+        self._outline_poll_id = None
+        # Hibernation: (compressed text, insert index, top fraction, modified) while parked;
+        # text None means "not loaded yet, read filepath on wake" (restored session tabs)
+        self._hibernated = None
+        self.last_active = time.monotonic()
+        # Dirty tracking: the Text modified flag, confirmed against the hash of the last saved text
+        self._saved_hash = None
+        self._highlight_deferred = False  # a highlight is queued for after the first frame
+
+        # Word completion: this buffer's identifiers feed the app-wide trie, line by line
+        self._words = BufferWords(app.words)
+        self._completion = None          # popup Listbox, created on first use
+        self._completion_shown = False
+        self._completion_after_id = None
+        self.on_change(self._on_edit_words)
 
         # Insert sample text for new file
         if not self.filepath:
             sample = self._sample_for_language()
             if sample:
                 self.text.insert("1.0", sample)
+                self.text.edit_modified(False)
 
         # initial update
+        self.on_change(self._on_text_changed)
         self.update_linenumbers()
         self.highlight_syntax()
 
@@ -146,27 +2394,17 @@ class EditorTab:
 
     def _on_vscroll(self, *args):
         self.text.yview(*args)
-        self.linenumbers.yview(*args)
 
     def _on_textscroll(self, *args):
         self.vbar.set(*args)
-        try:
-            self.linenumbers.yview_moveto(args[0])
-        except Exception:
-            pass
-
-    def _on_textscroll_ln(self, *args):
-        try:
-            self.text.yview_moveto(args[0])
-            self.vbar.set(*args)
-        except Exception:
-            pass
+        # the view moved: redraw the gutter once layout settles
+        self.schedule_update(0)
 
     def _setup_tags(self):
         font = ("Consolas", 11)
         self.text.configure(font=font, insertbackground="#ffffff", background="#1e1e1e",
                             foreground="#dcdcdc", selectbackground="#555555", wrap="none")
-        self.linenumbers.configure(font=font)
+        self._gutter_font = tkfont.Font(font=font)
 
         # Syntax tags
         self.text.tag_configure("kw", foreground="#ffb86c")
@@ -178,6 +2416,7 @@ class EditorTab:
         self.text.tag_configure("tag", foreground="#ffb86c")
         self.text.tag_configure("attr", foreground="#8be9fd")
         self.text.tag_configure("search", background="#444400")
+        self.text.tag_configure("search_current", background="#aa6600")
 
     def schedule_update(self, delay=50):
         if self._update_ln_after_id:
@@ -190,22 +2429,150 @@ class EditorTab:
     def on_text_change(self, event=None):
         self.schedule_update()
 
+    # ---------------------------
+    # Edit events
+    # ---------------------------
+    def _install_edit_proxy(self):
+        """
+        Rename the Text widget's Tcl command and put _dispatch in its place, so
+        typing, paste, undo/redo and programmatic edits all pass through one spot.
+        """
+        w = self.text._w
+        self._text_orig = w + "_orig"
+        self.text.tk.call("rename", w, self._text_orig)
+        self.text.tk.createcommand(w, self._dispatch)
+        self.text.tk.call(self._text_orig, "mark", "set", "edit_end", "1.0")
+        self.text.tk.call(self._text_orig, "mark", "gravity", "edit_end", "right")
+        self.text.bind("<Destroy>", self._remove_edit_proxy, add=True)
+
+    def _remove_edit_proxy(self, event=None):
+        if event is not None and event.widget is not self.text:
+            return
+        try:
+            self.text.tk.deletecommand(self.text._w)
+        except tk.TclError:
+            pass
+
+    def on_change(self, callback):
+        """Call callback(start, end, inserted_length) after every real modification:
+        old text between Tk indices start and end was replaced by inserted_length chars."""
+        self._change_listeners.append(callback)
+
+    def _dispatch(self, *args):
+        call = self.text.tk.call
+        if args and args[0] in ("insert", "delete", "replace"):
+            return self._tracked_edit(args)
+        if len(args) > 1 and args[0] == "edit" and args[1] in ("undo", "redo"):
+            return self._tracked_undo(args)
+        return call((self._text_orig,) + args)
+
+    def _pos(self, index):
+        """Tk index -> (line, col), clamped to the last real character like insert/delete do."""
+        call = self.text.tk.call
+        line, col = map(int, str(call(self._text_orig, "index", index)).split("."))
+        last_line, last_col = map(int, str(call(self._text_orig, "index", "end-1c")).split("."))
+        if (line, col) > (last_line, last_col):
+            return last_line, last_col
+        return line, col
+
+    def _tracked_edit(self, args):
+        call = self.text.tk.call
+        orig = self._text_orig
+        if str(call(orig, "cget", "-state")) == "disabled":
+            return call((orig,) + args)  # Tk ignores edits then
+        op = args[0]
+        if op == "insert":
+            start = end = self._pos(args[1])
+        elif op == "replace":
+            start, end = self._pos(args[1]), self._pos(args[2])
+        else:
+            # delete index1 ?index2 ...?: report the span covering every range
+            spans = []
+            for i in range(1, len(args), 2):
+                first = self._pos(args[i])
+                if i + 1 < len(args):
+                    spans.append((first, self._pos(args[i + 1])))
+                else:
+                    spans.append((first, self._pos(f"{args[i]}+1c")))
+            spans = [(a, b) for a, b in spans if a < b]
+            if not spans:
+                return call((orig,) + args)
+            start, end = min(a for a, _ in spans), max(b for _, b in spans)
+        start_idx = "%d.%d" % start
+        end_idx = "%d.%d" % end
+        call(orig, "mark", "set", "edit_end", end_idx)
+        result = call((orig,) + args)
+        # "edit_end" has right gravity, so it now sits after whatever replaced start..end
+        inserted = int(call(orig, "count", "-chars", start_idx, "edit_end") or 0)
+        if start != end or inserted:
+            self._emit(start_idx, end_idx, inserted)
+        return result
+
+    def _tracked_undo(self, args):
+        call = self.text.tk.call
+        orig = self._text_orig
+        if not call(orig, "edit", "can" + args[1]):
+            return call((orig,) + args)
+        old_end = str(call(orig, "index", "end-1c"))
+        count = self._edit_count
+        result = call((orig,) + args)
+        if self._edit_count == count:
+            # the undo stack bypassed the widget command: report the whole buffer
+            self._emit("1.0", old_end, int(call(orig, "count", "-chars", "1.0", "end-1c") or 0))
+        return result
+
+    def _emit(self, start, end, inserted):
+        self._edit_count += 1
+        for callback in self._change_listeners:
+            try:
+                callback(start, end, inserted)
+            except Exception:
+                self.text._report_exception()
+
+    def _on_text_changed(self, start, end, inserted):
+        if self._hibernated is not None:
+            return  # hibernate()/wake() swap the text wholesale
+        self.schedule_highlight()
+        self.schedule_outline()
+        # the gutter only changes when lines were added or removed
+        if start.split(".")[0] != end.split(".")[0] or \
+                self.text.index(f"{start}+{inserted}c").split(".")[0] != start.split(".")[0]:
+            self.schedule_update(0)
+        if self.dirty:
+            self.app.schedule_autosave(self)  # restarts the autosave delay
+
     def update_linenumbers(self):
+        """Draw numbers for the lines in the viewport only; skip if nothing moved."""
+        with PROFILER.span("gutter"):
+            self._draw_linenumbers()
+
+    def _draw_linenumbers(self):
         try:
+            first = int(self.text.index("@0,0").split(".")[0])
             lines = int(self.text.index("end-1c").split(".")[0])
+            info = self.text.dlineinfo(f"{first}.0")
         except Exception:
-            lines = 1
-        self.linenumbers.config(state="normal")
-        self.linenumbers.delete("1.0", "end")
-        ln_txt = "\n".join(str(i) for i in range(1, lines + 1))
-        self.linenumbers.insert("1.0", ln_txt)
-        self.linenumbers.config(state="disabled")
-
-    def on_key_release(self, event=None):
-        # schedule syntax highlight after typing
-        self.schedule_highlight()
+            return
+        if info is None:
+            return  # not laid out yet; <Configure> will call again
+        state = (first, info[1], lines, self.text.winfo_height())
+        if state == self._gutter_state:
+            return
+        self._gutter_state = state
+        width = self._gutter_font.measure("9" * max(3, len(str(lines)))) + 12
+        if int(self.linenumbers.cget("width")) != width:
+            self.linenumbers.config(width=width)
+        self.linenumbers.delete("all")
+        ln = first
+        while info is not None and ln <= lines:
+            self.linenumbers.create_text(width - 6, info[1], anchor="ne", text=str(ln),
+                                         font=self._gutter_font, fill="#bbb")
+            ln += 1
+            info = self.text.dlineinfo(f"{ln}.0")
 
     def schedule_highlight(self, delay=150):
+        # any pending background result now describes an outdated buffer
+        self._highlight_gen += 1
         if self._highlight_after_id:
             try:
                 self.text.after_cancel(self._highlight_after_id)
@@ -214,159 +2581,229 @@ class EditorTab:
         self._highlight_after_id = self.text.after(delay, self.highlight_syntax)
 
     def highlight_syntax(self):
+        if not self.highlight_enabled:
+            return
+        if not self.app.painted:
+            # lexing would import Pygments on the worker before the first frame is up
+            if not self._highlight_deferred:
+                self._highlight_deferred = True
+                self.app.after_first_paint(self._deferred_highlight)
+            return
         content = self.text.get("1.0", "end-1c")
         if content is None:
             return
-        # clear tags
-        for tag in ("kw", "builtin", "comment", "string", "number", "operator", "tag", "attr"):
-            self.text.tag_remove(tag, "1.0", "end")
-        if USE_PYGMENTS:
+        # lex off the Tk thread; re-lex only the lines touched since the last pass
+        if self._highlighter is None or self._highlighter_lang != self.language:
+            for tag in SYNTAX_TAGS:
+                self.text.tag_remove(tag, "1.0", "end")
+            if USE_PYGMENTS:
+                self._highlighter = IncrementalHighlighter(self.language)
+            else:
+                scanner = get_scanner(self.language)
+                if scanner is None:
+                    self._highlighter = None
+                    return  # no rules for this language: plain text
+                self._highlighter = IncrementalHighlighter(self.language, scanner)
+            self._highlighter_lang = self.language
+        self._highlight_submitted = self._highlight_gen
+        get_highlight_worker().submit(self._highlighter, self._highlight_gen, content, self._highlight_results)
+        if self._highlight_poll_id is None:
+            self._highlight_poll_id = self.text.after(10, self._poll_highlight)
+
+    def _deferred_highlight(self):
+        self._highlight_deferred = False
+        self.highlight_syntax()
+
+    def _poll_highlight(self):
+        self._highlight_poll_id = None
+        waiting = True
+        try:
+            while True:
+                highlighter, generation, result = self._highlight_results.get_nowait()
+                if generation == self._highlight_submitted:
+                    waiting = False
+                if generation != self._highlight_gen or highlighter is not self._highlighter:
+                    PROFILER.count("highlight.stale")
+                    continue  # stale: the buffer changed after this snapshot was taken
+                self._apply_highlight(highlighter, result)
+        except queue.Empty:
+            pass
+        except tk.TclError:
+            return  # tab was closed
+        if waiting:
+            self._highlight_poll_id = self.text.after(15, self._poll_highlight)
+
+    def _apply_highlight(self, highlighter, result):
+        if isinstance(result, Exception):
+            # drop incremental state; the next pass starts from scratch
+            self._highlighter = None
+            for tag in SYNTAX_TAGS:
+                self.text.tag_remove(tag, "1.0", "end")
+            self._basic_highlight(self.get_content())
+            return
+        if result is None:
+            return
+        first, stop, ranges, lines = result[:4]
+        end = "end" if stop >= len(lines) else f"{stop + 1}.0"
+        with PROFILER.span("tag"):
+            for tag in SYNTAX_TAGS:
+                self.text.tag_remove(tag, f"{first + 1}.0", end)
+            self._apply_tags(ranges)
+        PROFILER.count("highlight.lines", stop - first)
+        highlighter.commit(result)
+
+    def _basic_highlight(self, content):
+        """Synchronous whole-buffer RegexScanner pass (fallback when the background lexer fails)."""
+        scanner = get_scanner(self.language)
+        if scanner is None:
+            return
+        with PROFILER.span("highlight.basic"):
+            offsets = {}
+            for start, end, tag in scanner.scan(content):
+                offsets.setdefault(tag, []).extend((start, end))
+            index = LineIndex(content)
+            self._apply_tags({tag: index.indices(pos) for tag, pos in offsets.items()})
+
+    def _apply_tags(self, ranges):
+        # one multi-range "tag add" per tag instead of a Tcl round trip per token
+        for tag, indices in ranges.items():
+            if not indices:
+                continue
             try:
-                self._highlight_with_pygments(content)
+                self.text.tk.call(self.text._w, "tag", "add", tag, *indices)
+            except tk.TclError:
+                pass
+
+    # ---------------------------
+    # Outline
+    # ---------------------------
+    def schedule_outline(self, delay=300):
+        if self._outline_after_id:
+            try:
+                self.text.after_cancel(self._outline_after_id)
             except Exception:
-                self._basic_highlight(content)
-        else:
-            self._basic_highlight(content)
-
-    def _highlight_with_pygments(self, content):
-        lexers = {
-            "python": PythonLexer(),
-            "c": CLexer(),
-            "cpp": CppLexer(),
-            "c++": CppLexer(),
-            "html": HtmlLexer(),
-            "htm": HtmlLexer(),
-            "css": CssLexer(),
-            "javascript": JavascriptLexer(),
-            "js": JavascriptLexer(),
-            "typescript": TypeScriptLexer(),
-            "ts": TypeScriptLexer(),
-            "rust": RustLexer(),
-            "java": JavaLexer(),
-            "lua": LuaLexer(),
-            "go": GoLexer(),
-            "csharp": CSharpLexer(),
-            "cs": CSharpLexer(),
-            "c#": CSharpLexer(),
-            "ruby": RubyLexer(),
-            "rb": RubyLexer(),
-            "kotlin": KotlinLexer(),
-            "kt": KotlinLexer(),
-            "nix": NixLexer(),
-        }
-        lexer = lexers.get(self.language, PythonLexer())
-
-        def map_token_to_tag(ttype):
-            if ttype in Token.Comment or ttype in Token.Comment.Preproc:
-                return "comment"
-            if ttype in Token.Keyword:
-                return "kw"
-            if ttype in Token.Name.Builtin or ttype in Token.Name.Function or ttype in Token.Name.Class:
-                return "builtin"
-            if ttype in Token.String:
-                return "string"
-            if ttype in Token.Number:
-                return "number"
-            if ttype in Token.Operator or ttype in Token.Punctuation:
-                return "operator"
-            if ttype in Token.Name.Tag:
-                return "tag"
-            if ttype in Token.Name.Attribute:
-                return "attr"
-            return None
+                pass
+        self._outline_after_id = self.text.after(delay, self.refresh_outline)
 
-        pos = 0
-        for tok_type, tok_str in lex(content, lexer):
-            if not tok_str:
-                continue
-            length = len(tok_str)
-            tag = map_token_to_tag(tok_type)
-            if tag:
-                try:
-                    start = self._index_from_pos(pos, content)
-                    end = self._index_from_pos(pos + length, content)
-                    self.text.tag_add(tag, start, end)
-                except Exception:
-                    pass
-            pos += length
+    def refresh_outline(self):
+        """Find the buffer's symbols off the Tk thread; self.symbols is replaced when done."""
+        self._outline_after_id = None
+        if self._hibernated is not None or self.large_file:
+            return
+        if self._outline is None or self._outline.language != self.language:
+            self._outline = DocumentOutline(self.language)
+        self._outline_submitted = self._edit_count
+        get_highlight_worker().submit(self._outline, self._edit_count, self.text.get("1.0", "end-1c"),
+                                      self._outline_results)
+        if self._outline_poll_id is None:
+            self._outline_poll_id = self.text.after(20, self._poll_outline)
 
-    def _basic_highlight(self, content):
-        lang = self.language
-        # naive regex-based rules (keeps behavior if pygments absent)
-        if lang in ("python",):
-            for m in re.finditer(r"#.*", content):
-                self._tag_range("comment", m.start(), m.end(), content)
-            for m in re.finditer(r"(\"\"\".*?\"\"\"|'''.*?'''|\".*?\"|'.*?')", content, flags=re.S):
-                self._tag_range("string", m.start(), m.end(), content)
-            keywords = r"\b(?:def|class|if|else|elif|for|while|try|except|finally|with|as|import|from|return|in|is|and|or|not|lambda|pass|break|continue|yield|global|nonlocal|assert|del)\b"
-            for m in re.finditer(keywords, content):
-                self._tag_range("kw", m.start(), m.end(), content)
-        elif lang in ("c", "cpp", "c++", "rust", "java", "go", "csharp", "cs", "c#", "kotlin", "kt"):  # Added C# and Kotlin
-            for m in re.finditer(r"//.*", content):
-                self._tag_range("comment", m.start(), m.end(), content)
-            for m in re.finditer(r"/\*.*?\*/", content, flags=re.S):
-                self._tag_range("comment", m.start(), m.end(), content)
-            for m in re.finditer(r"\".*?\"|'.*?'", content, flags=re.S):
-                self._tag_range("string", m.start(), m.end(), content)
-            # Extended keywords for C# and Kotlin
-            keywords = r"\b(?:int|char|float|double|void|if|else|for|while|do|switch|case|break|continue|return|struct|typedef|enum|const|static|extern|sizeof|class|public|private|protected|using|namespace|package|import|func|let|var|impl|trait|fn|match|mod|println|println!|string|bool|interface|virtual|override|sealed|abstract|readonly|async|await|fun|val|suspend|companion|object|init|constructor|internal|open|final|data|get|set)\b"
-            for m in re.finditer(keywords, content):
-                self._tag_range("kw", m.start(), m.end(), content)
-        elif lang in ("ruby", "rb"):  # Add Ruby highlighting
-            for m in re.finditer(r"#.*", content):
-                self._tag_range("comment", m.start(), m.end(), content)
-            for m in re.finditer(r"(\"\"\".*?\"\"\"|'''.*?'''|\".*?\"|'.*?'|%[qQ]?\{.*?\}|%[qQ]?\[.*?\])", content, flags=re.S):
-                self._tag_range("string", m.start(), m.end(), content)
-            keywords = r"\b(?:def|class|if|else|elsif|end|unless|case|when|while|until|for|in|do|module|begin|rescue|ensure|yield|return|super|self|nil|true|false|and|or|not|alias|undef|BEGIN|END)\b"
-            for m in re.finditer(keywords, content):
-                self._tag_range("kw", m.start(), m.end(), content)
-        elif lang == "nix":  # Add Nix highlighting
-            for m in re.finditer(r"#.*", content):
-                self._tag_range("comment", m.start(), m.end(), content)
-            for m in re.finditer(r"\".*?\"|''.*?''", content, flags=re.S):
-                self._tag_range("string", m.start(), m.end(), content)
-            keywords = r"\b(?:let|in|rec|with|inherit|or|import|importall|builtins|null|true|false|mkDerivation|mkShell|fetchFromGitHub|stdenv|lib|pkgs)\b"
-            for m in re.finditer(keywords, content):
-                self._tag_range("kw", m.start(), m.end(), content)
-        elif lang in ("html", "htm"):
-            for m in re.finditer(r"<[^>]+>", content):
-                self._tag_range("tag", m.start(), m.end(), content)
-            for m in re.finditer(r"(\w+)(?=\=)", content):
-                self._tag_range("attr", m.start(), m.end(), content)
-            for m in re.finditer(r"\".*?\"|'.*?'", content, flags=re.S):
-                self._tag_range("string", m.start(), m.end(), content)
-        elif lang in ("css",):
-            for m in re.finditer(r"/\*.*?\*/", content, flags=re.S):
-                self._tag_range("comment", m.start(), m.end(), content)
-            for m in re.finditer(r"\".*?\"|'.*?'", content, flags=re.S):
-                self._tag_range("string", m.start(), m.end(), content)
-        elif lang in ("javascript", "js", "typescript", "ts", "lua"):
-            for m in re.finditer(r"//.*", content):
-                self._tag_range("comment", m.start(), m.end(), content)
-            for m in re.finditer(r"/\*.*?\*/", content, flags=re.S):
-                self._tag_range("comment", m.start(), m.end(), content)
-            for m in re.finditer(r"\".*?\"|'.*?'|`.*?`", content, flags=re.S):
-                self._tag_range("string", m.start(), m.end(), content)
-            keywords = r"\b(?:function|var|let|const|if|else|for|while|return|new|this|class|extends|constructor|import|from|export|await|async|console|print)\b"
-            for m in re.finditer(keywords, content):
-                self._tag_range("kw", m.start(), m.end(), content)
-
-    def _tag_range(self, tag, start_idx, end_idx, text):
-        start = self._index_from_pos(start_idx, text)
-        end = self._index_from_pos(end_idx, text)
+    def _poll_outline(self):
+        self._outline_poll_id = None
+        waiting = True
+        changed = False
         try:
-            self.text.tag_add(tag, start, end)
-        except Exception:
+            while True:
+                outline, edit_count, result = self._outline_results.get_nowait()
+                if edit_count == self._outline_submitted:
+                    waiting = False
+                if outline is not self._outline or result is None or isinstance(result, Exception):
+                    continue
+                # an older snapshot is still a consistent one; the next pass diffs against it
+                outline.commit(result)
+                self.symbols = outline.symbols
+                changed = True
+        except queue.Empty:
             pass
+        except tk.TclError:
+            return  # tab was closed
+        if changed:
+            self.app._on_outline_changed(self)
+        if waiting:
+            self._outline_poll_id = self.text.after(20, self._poll_outline)
 
-    def _index_from_pos(self, pos, text):
-        upto = text[:pos]
-        line = upto.count("\n") + 1
-        if "\n" in upto:
-            col = len(upto.split("\n")[-1])
-        else:
-            col = len(upto)
-        return f"{line}.{col}"
+    # ---------------------------
+    # Word completion
+    # ---------------------------
+    def _on_edit_words(self, start, end, inserted):
+        if self._hibernated is not None or self.large_file:
+            return  # a hibernated tab keeps its words; wake() reads them again
+        first, last = int(start.split(".")[0]), int(end.split(".")[0])
+        new_last = int(self.text.index(f"{start}+{inserted}c").split(".")[0]) if inserted else first
+        self._words.replace_lines(first, last, self.text.get(f"{first}.0", f"{new_last}.0 lineend").split("\n"))
+        # typing a word character opens the popup; any edit refreshes an open one
+        typed = self.text.get(start) if inserted == 1 and start == end else ""
+        if self._completion_shown or typed.isalnum() or typed == "_":
+            if self._completion_after_id is None:
+                self._completion_after_id = self.text.after_idle(self._update_completion)
+
+    def _completion_prefix(self):
+        m = re.search(r"[^\W\d]\w*$", self.text.get("insert linestart", "insert"))
+        return m.group() if m else ""
+
+    def _update_completion(self):
+        self._completion_after_id = None
+        prefix = self._completion_prefix()
+        words = self.app.complete_word(prefix) if len(prefix) >= 2 else []
+        bbox = self.text.bbox("insert") if words else None
+        if not bbox:
+            self.hide_completion()
+            return
+        if self._completion is None:
+            self._completion = tk.Listbox(self.text, activestyle="none", exportselection=False, takefocus=0,
+                                          font=self.text.cget("font"), background="#252526",
+                                          foreground="#dcdcdc", selectbackground="#094771",
+                                          selectforeground="#ffffff", highlightthickness=1,
+                                          relief="flat", borderwidth=0)
+            self._completion.bind("<Button-1>", self._on_completion_click)
+        box = self._completion
+        box.delete(0, "end")
+        box.insert("end", *words)
+        box.config(height=len(words), width=max(map(len, words)) + 1)
+        box.selection_set(0)
+        box.activate(0)
+        x, y, _w, h = bbox
+        if y + h + box.winfo_reqheight() > self.text.winfo_height():
+            y -= box.winfo_reqheight() + h  # no room below the cursor line
+        box.place(x=x, y=y + h)
+        self._completion_shown = True
+
+    def _completion_move(self, delta):
+        if not self._completion_shown:
+            return None
+        box = self._completion
+        cur = box.curselection()
+        i = max(0, min(box.size() - 1, (cur[0] if cur else 0) + delta))
+        box.selection_clear(0, "end")
+        box.selection_set(i)
+        box.activate(i)
+        box.see(i)
+        return "break"
+
+    def _on_completion_click(self, event):
+        # handled here so the Listbox never takes the keyboard focus from the editor
+        box = self._completion
+        box.selection_clear(0, "end")
+        box.selection_set(box.nearest(event.y))
+        return self.accept_completion()
+
+    def accept_completion(self, event=None):
+        """Complete the word before the cursor with the selected suggestion."""
+        if not self._completion_shown:
+            return None
+        cur = self._completion.curselection()
+        word = self._completion.get(cur[0]) if cur else ""
+        self.hide_completion()
+        prefix = self._completion_prefix()
+        if word.startswith(prefix):
+            self.text.insert("insert", word[len(prefix):])
+        self.text.focus_set()
+        return "break"
+
+    def hide_completion(self, event=None):
+        if self._completion_shown:
+            self._completion.place_forget()
+            self._completion_shown = False
 
     # ---------------------------
     # Auto-indent improvements
@@ -378,6 +2815,8 @@ class EditorTab:
         - if previous line ends with colon (python) or opener -> add indent
         - if cursor before closing brace, create block and position cursor
         """
+        if self._completion_shown:
+            return self.accept_completion()
         cur = self.text.index("insert")
         line, col = map(int, cur.split("."))
         prev_line_text = self.text.get(f"{max(1, line-1)}.0", f"{line-1}.end") if line > 1 else ""
@@ -405,27 +2844,56 @@ class EditorTab:
             self.text.insert("insert", insert_text)
             # set cursor on the indented middle line
             self.text.mark_set("insert", f"{line+1}.{len(indent + extra)}")
-            self.schedule_highlight()
             return "break"
 
         # normal case
         self.text.insert("insert", "\n" + indent + extra)
-        self.schedule_highlight()
         return "break"
 
     def on_tab_key(self, event=None):
-        # indent selection or insert 4 spaces
+        # accept a completion, else indent selection or insert 4 spaces
+        if self._completion_shown:
+            return self.accept_completion()
         try:
             sel_start = self.text.index("sel.first")
             sel_end = self.text.index("sel.last")
             start_line = int(sel_start.split(".")[0])
             end_line = int(sel_end.split(".")[0])
-            for ln in range(start_line, end_line + 1):
-                self.text.insert(f"{ln}.0", " " * 4)
+            self._edit_lines(start_line, [(0, 0, " " * 4)] * (end_line - start_line + 1))
         except tk.TclError:
             self.text.insert("insert", " " * 4)
         return "break"
 
+    def _edit_lines(self, first, edits):
+        """
+        Apply per-line edits to lines first, first+1, ... as one replace, so listeners see
+        one change instead of one per line. edits[i] = (col, chars to delete, text to insert)
+        for line first+i, or None. The selection and the insert mark move as with separate edits.
+        """
+        last = first + len(edits) - 1
+        old = self.text.get(f"{first}.0", f"{last}.end").split("\n")
+        new = [line if e is None else line[:e[0]] + e[2] + line[e[0] + e[1]:] for line, e in zip(old, edits)]
+        if new == old:
+            return
+
+        def moved(index, right_gravity):
+            ln, col = map(int, self.text.index(index).split("."))
+            e = edits[ln - first] if first <= ln <= last else None
+            if e is not None:
+                c, n, s = e
+                if col >= c + n and (col > c or right_gravity):
+                    col += len(s) - n
+                elif col > c:
+                    col = c
+            return f"{ln}.{col}"
+        sel = self.text.tag_ranges("sel")
+        sel = [moved(sel[0], False), moved(sel[-1], False)] if sel else []
+        insert = moved("insert", True)
+        self.text.replace(f"{first}.0", f"{last}.end", "\n".join(new))
+        if sel:
+            self.text.tag_add("sel", *sel)
+        self.text.mark_set("insert", insert)
+
     def on_backspace(self, event=None):
         # smart dedent if previous 4 spaces present; also handle deleting paired empty quotes/brackets
         cur = self.text.index("insert")
@@ -456,6 +2924,8 @@ class EditorTab:
     }
 
     def _on_keypress(self, event):
+        if self._completion_shown and event.keysym in ("Left", "Right", "Home", "End", "Prior", "Next"):
+            self.hide_completion()
         # Handle only simple printable characters that are pairs
         ch = event.char
         if not ch:
@@ -474,7 +2944,6 @@ class EditorTab:
                 self.text.tag_remove("sel", "1.0", "end")
                 self.text.tag_add("sel", sel_start + "+1c", f"{sel_start}+{1+len(sel_text)}c")
                 self.text.mark_set("insert", f"{sel_start}+{1+len(sel_text)}c")
-                self.schedule_highlight()
                 return "break"
             except tk.TclError:
                 # no selection -> insert pair and move cursor between them
@@ -482,7 +2951,6 @@ class EditorTab:
                 self.text.insert("insert", ch + closing)
                 # move cursor backward one char to be between
                 self.text.mark_set("insert", "insert-1c")
-                self.schedule_highlight()
                 return "break"
         # If user types closing char and it's already present right after cursor, skip insertion and move cursor right
         if ch in self._PAIRS.values():
@@ -511,18 +2979,13 @@ class EditorTab:
             prefix = "# "
         else:
             prefix = "// "
-        lines = [self.text.get(f"{ln}.0", f"{ln}.end") for ln in range(start_line, end_line + 1)]
-        if all(l.lstrip().startswith(prefix.strip()) for l in lines if l.strip() != ""):
-            for i, ln in enumerate(range(start_line, end_line + 1)):
-                line_text = lines[i]
-                if prefix.strip() in line_text:
-                    real_idx = self.text.search(re.escape(prefix.strip()), f"{ln}.0", f"{ln}.end", regexp=True)
-                    if real_idx:
-                        self.text.delete(real_idx, f"{real_idx}+{len(prefix.strip())}c")
+        lines = self.text.get(f"{start_line}.0", f"{end_line}.end").split("\n")
+        marker = prefix.strip()
+        if all(l.lstrip().startswith(marker) for l in lines if l.strip() != ""):
+            self._edit_lines(start_line, [(l.find(marker), len(marker), "") if marker in l else None
+                                          for l in lines])
         else:
-            for ln in range(start_line, end_line + 1):
-                self.text.insert(f"{ln}.0", prefix)
-        self.schedule_highlight()
+            self._edit_lines(start_line, [(0, 0, prefix)] * len(lines))
         return "break"
 
     def _sample_for_language(self):
@@ -545,10 +3008,127 @@ class EditorTab:
         }
         return samples.get(self.language, "")
 
-    def get_content(self):
-        return self.text.get("1.0", "end-1c")
+    def get_content(self):
+        if self._hibernated is not None:
+            if self._hibernated[0] is None:
+                with open(self.filepath, "r", encoding="utf-8") as f:
+                    return f.read()
+            return zlib.decompress(self._hibernated[0]).decode("utf-8")
+        return self.text.get("1.0", "end-1c")
+
+    # ---------------------------
+    # Hibernation (idle background tabs)
+    # ---------------------------
+    @property
+    def hibernated(self):
+        return self._hibernated is not None
+
+    def hibernate(self):
+        """
+        Park the buffer as zlib-compressed text and empty the Text widget, which
+        frees its tag ranges, undo history and highlighter state. wake() restores it.
+        Tabs with unsaved changes are left alone so their undo history survives.
+        """
+        if self._hibernated is not None or self.large_file or self.dirty:
+            return False
+        for after_id in (self._highlight_after_id, self._update_ln_after_id, self._highlight_poll_id,
+                         self._outline_after_id, self._outline_poll_id):
+            if after_id:
+                try:
+                    self.text.after_cancel(after_id)
+                except Exception:
+                    pass
+        self._highlight_after_id = self._update_ln_after_id = self._highlight_poll_id = None
+        self._outline_after_id = self._outline_poll_id = None
+        self.hide_completion()
+        content = self.text.get("1.0", "end-1c")
+        self._hibernated = (zlib.compress(content.encode("utf-8"), 1), self.text.index("insert"),
+                            self.text.yview()[0], self.text.edit_modified())
+        self.text.config(state="normal", undo=False)
+        self.text.delete("1.0", "end")
+        self.text.config(undo=True, state="disabled" if self.readonly else "normal")
+        self.text.edit_reset()
+        self.text.edit_modified(False)  # dirty state lives in _hibernated meanwhile
+        self._highlighter = None
+        self._highlight_gen += 1  # drop any result still in flight
+        self.linenumbers.delete("all")
+        self._gutter_state = None
+        return True
+
+    def defer_load(self, insert="1.0", top=0.0):
+        """Leave the widget empty until the tab is first selected, then load filepath."""
+        self._hibernated = (None, insert, top, False)
+
+    def wake(self):
+        """Rebuild the widget contents of a hibernated tab (undo history starts fresh)."""
+        if self._hibernated is None:
+            return
+        data, insert, top, modified = self._hibernated
+        self._hibernated = None
+        if data is None:
+            try:
+                if self.filepath.stat().st_size >= LARGE_FILE_THRESHOLD:
+                    self.app._load_large_file(self, self.filepath)
+                    return
+                content = self.get_content()
+            except Exception as e:
+                self.app.update_status(f"Unable to open {self.filepath}: {e}")
+                return
+            self._saved_hash = hash(content)
+        else:
+            content = zlib.decompress(data).decode("utf-8")
+        self._words.clear()  # the insert below reports every line again
+        self.text.config(state="normal", undo=False)
+        self.text.insert("1.0", content)
+        self.text.config(undo=True, state="disabled" if self.readonly else "normal")
+        self.text.edit_reset()
+        self.text.edit_modified(modified)
+        self.text.mark_set("insert", insert)
+        self.text.yview_moveto(top)
+        self.highlight_syntax()
+        self.update_linenumbers()
+
+    def session_state(self):
+        """What the session file remembers about this tab."""
+        if self._hibernated is not None:
+            insert, top = self._hibernated[1], self._hibernated[2]
+        else:
+            insert, top = self.text.index("insert"), self.text.yview()[0]
+        return {"path": str(self.filepath), "language": self.language, "insert": insert,
+                "top": top, "readonly": self.readonly and not self.large_file}
+
+    def set_readonly(self, readonly):
+        self.readonly = readonly
+        self.text.config(state="disabled" if readonly else "normal")
+        self._update_tab_title()
+
+    @property
+    def dirty(self):
+        """True if the buffer changed since it was loaded or last saved."""
+        if self._hibernated is not None:
+            return bool(self._hibernated[3])
+        return bool(self.text.edit_modified())
+
+    def _set_modified(self, modified):
+        if self._hibernated is not None:
+            self._hibernated = self._hibernated[:3] + (modified,)
+            self._update_tab_title()
+        else:
+            self.text.edit_modified(modified)  # <<Modified>> refreshes the title
+
+    def _on_modified(self, event=None):
+        if self._hibernated is not None:
+            return  # the widget was emptied on purpose
+        self._update_tab_title()
+        if self.dirty:
+            self.app.schedule_autosave(self)
 
-    def save(self, path=None):
+    def save(self, path=None, autosave=False):
+        """
+        Snapshot the buffer and hand it to the save worker (atomic write off the
+        Tk thread); the app reports the outcome. Returns False when the text is
+        identical to what was last saved and nothing was written.
+        """
         if path:
             self.filepath = Path(path)
         if not self.filepath:
@@ -561,15 +3141,23 @@ class EditorTab:
                 if self.filepath.suffix.lower() != expected_ext.lower():
                     self.filepath = self.filepath.with_suffix(expected_ext)
         data = self.get_content()
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            f.write(data)
+        digest = hash(data)
+        if not path and digest == self._saved_hash and self.filepath.exists():
+            self._set_modified(False)  # edited back to the saved text
+            return False
+        # the tab stays dirty until the write succeeds, and after it if the text changed meanwhile
+        get_save_worker().submit(self.filepath, data, self.app._save_results,
+                                 (self, digest, autosave, self._edit_count))
+        self.app._watch_saves()
         self.title = self.filepath.name
         self._update_tab_title()
+        return True
 
     def _update_tab_title(self):
         try:
             idx = self.notebook.index(self.frame)
-            self.notebook.tab(idx, text=self.title)
+            self.notebook.tab(idx, text=self.title + (" *" if self.dirty else "") +
+                              (" [read-only]" if self.readonly else ""))
         except Exception:
             pass
 
@@ -582,11 +3170,25 @@ class VanillaStudioApp:
         self.root.title(APP_TITLE)
         self.root.geometry("1100x720")
         self.workspace_path = None  # current workspace folder path (Path)
+        # work that would load heavy modules waits until the first frame is on screen
+        self.painted = False
+        self._after_paint = []
         self._setup_style()
         self._create_widgets()
         self._setup_menu()
         self._bind_shortcuts()
-        self.new_file()
+        if not self.restore_session():
+            self.new_file()
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
+        self.root.after(60_000, self._hibernate_idle_tabs)
+        # first highlight, workspace indexing and deferred imports start once the window is up
+        self.root.after_idle(lambda: self.root.after(100, self._on_first_paint))
+        if PROFILER.enabled:
+            self.toggle_perf_overlay()
+        # set VANILLA_WATCHDOG=0 to turn off stall logging
+        self.watchdog = StallWatchdog(self.root)
+        if os.environ.get("VANILLA_WATCHDOG", "1") != "0":
+            self.watchdog.start()
         if not USE_PYGMENTS:
             self.append_console("Note: Pygments not found. Install 'pygments' (pip install pygments) for improved highlighting.\n")
 
@@ -645,28 +3247,99 @@ class VanillaStudioApp:
         self.notebook = ttk.Notebook(self.right_outer)
         self.notebook.pack(fill="both", expand=True)
         self.tabs = []
+        self._tab_by_widget = {}  # str(tab.frame) -> EditorTab
+        self._active_tab = None
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        # Saving: results of background writes, autosave timers per tab
+        self._save_results = queue.Queue()
+        self._save_poll_id = None
+        self.autosave_var = tk.BooleanVar(value=False)
+        self._autosave_after = {}
 
-        # Bottom console
+        # Bottom console: a "Console" page for IDE messages plus one page per run
         console_frame = ttk.Frame(self.right_outer)
         console_frame.pack(side="bottom", fill="x")
-        console_label = ttk.Label(console_frame, text="Console Output:")
-        console_label.pack(anchor="w")
-        self.console = ScrolledText(console_frame, height=10, state="disabled")
-        self.console.pack(fill="both", expand=False)
+        self.console_frame = console_frame
+        self.console_notebook = ttk.Notebook(console_frame)
+        self.console_notebook.pack(fill="both", expand=False)
+        self.console = ScrolledText(self.console_notebook, height=10, state="disabled")
+        self.console.tag_configure("stderr", foreground="#cc3333")
+        self.console_notebook.add(self.console, text="Console")
+        self._console_queue = queue.Queue()
+
+        # Search bar (Ctrl+F) - packed above the console when shown
+        self.search_bar = ttk.Frame(self.right_outer)
+        self.search_var = tk.StringVar()
+        self.search_regex_var = tk.BooleanVar(value=False)
+        self.search_case_var = tk.BooleanVar(value=False)
+        self.search_count_var = tk.StringVar(value="")
+        ttk.Label(self.search_bar, text="Find:").pack(side="left", padx=(4, 2))
+        self.search_entry = ttk.Entry(self.search_bar, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side="left", padx=2, pady=2)
+        ttk.Checkbutton(self.search_bar, text="Regex", variable=self.search_regex_var,
+                        command=self._search_refresh).pack(side="left", padx=2)
+        ttk.Checkbutton(self.search_bar, text="Match case", variable=self.search_case_var,
+                        command=self._search_refresh).pack(side="left", padx=2)
+        ttk.Button(self.search_bar, text="▲", width=3, command=self.search_prev).pack(side="left", padx=2)
+        ttk.Button(self.search_bar, text="▼", width=3, command=self.search_next).pack(side="left", padx=2)
+        ttk.Label(self.search_bar, textvariable=self.search_count_var).pack(side="left", padx=6)
+        ttk.Button(self.search_bar, text="✕", width=3, command=self.hide_search).pack(side="right", padx=2)
+        self.search_entry.bind("<KeyRelease>", self._on_search_key)
+        self.search_entry.bind("<Return>", lambda e: self.search_next())
+        self.search_entry.bind("<Shift-Return>", lambda e: self.search_prev())
+        self.search_entry.bind("<Escape>", lambda e: self.hide_search())
+        self._search = None            # (tab, generation, key, BufferSearch) of the last search
+        self._search_current = None    # (match number, insert index) of the selected match
+        self._search_after_id = None
 
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         status = ttk.Label(self.root, textvariable=self.status_var, relief="sunken", anchor="w")
         status.pack(side="bottom", fill="x")
+        self.status_label = status
+        # Performance readout (View > Performance Overlay), shown above the status bar
+        self.perf_var = tk.StringVar(value="")
+        self.perf_overlay_var = tk.BooleanVar(value=PROFILER.enabled)
+        self.perf_label = ttk.Label(self.root, textvariable=self.perf_var, relief="sunken", anchor="w",
+                                    font="TkFixedFont")
+        self._perf_after_id = None
 
-        # Running state
-        self._run_thread = None
-        self._stop_event = threading.Event()
+        # Outline panel (View > Outline): symbols of the current tab, nested by indentation
+        self.outline_var = tk.BooleanVar(value=False)
+        self.outline_frame = ttk.Frame(self.main_pane, width=220)
+        self.outline_tree = ttk.Treeview(self.outline_frame, columns=("kind",), selectmode="browse")
+        self.outline_tree.heading("#0", text="Outline", anchor="w")
+        self.outline_tree.heading("kind", text="", anchor="w")
+        self.outline_tree.column("kind", width=70, stretch=False)
+        self.outline_tree.pack(fill="both", expand=True)
+        self.outline_tree.bind("<Double-1>", self._on_outline_activate)
+        self.outline_tree.bind("<Return>", self._on_outline_activate)
+        self._outline_shown = None  # (tab, [(kind, name, indent)]) currently in the panel
+
+        # Running state: every run gets its own console page (job -> (page, text, header var))
+        self.runs = RunManager()
+        self._run_panes = {}
+        self._run_status = "Ready"
+        self._console_poll_id = None
 
         # File tree (Treeview) - created but not packed until workspace opened
         self.tree = ttk.Treeview(self.left_frame, columns=("fullpath", "type"), displaycolumns=())
         self.tree.heading("#0", text="Workspace", anchor="w")
         self.tree.bind("<Double-1>", self._on_tree_double_click)
+        self.tree.bind("<<TreeviewOpen>>", self._on_tree_open)
+        # Lazy loading: folders are listed on a background thread when expanded
+        self._tree_queue = queue.Queue()
+        self._tree_pending = 0
+        self._tree_gen = 0
+        self._tree_ignored = None
+        # Workspace file index for quick open (built in the background)
+        self.file_index = None
+        # Workspace symbol index for go to symbol (SQLite, built in the background)
+        self.symbol_index = None
+        # Word completion: identifiers of the open tabs, and of the workspace files (built in the background)
+        self.words = CompletionTrie()
+        self.workspace_words = None
+        self._workspace_words_stop = None
         # Add a small close workspace button
         self.left_top = ttk.Frame(self.left_frame)
         self.left_top.pack(side="top", fill="x")
@@ -681,10 +3354,12 @@ class VanillaStudioApp:
         filemenu = tk.Menu(menubar, tearoff=0)
         filemenu.add_command(label="New", command=self.new_file, accelerator="Ctrl+N")
         filemenu.add_command(label="Open...", command=self.open_file, accelerator="Ctrl+O")
+        filemenu.add_command(label="Quick Open...", command=self.quick_open, accelerator="Ctrl+P")
         filemenu.add_command(label="Save", command=self.save_file, accelerator="Ctrl+S")
         filemenu.add_command(label="Save As...", command=self.save_file_as, accelerator="Ctrl+Shift+S")
+        filemenu.add_checkbutton(label="Auto Save", variable=self.autosave_var)
         filemenu.add_separator()
-        filemenu.add_command(label="Exit", command=self.root.quit)
+        filemenu.add_command(label="Exit", command=self.quit_app)
         menubar.add_cascade(label="File", menu=filemenu)
 
         editmenu = tk.Menu(menubar, tearoff=0)
@@ -692,14 +3367,27 @@ class VanillaStudioApp:
         editmenu.add_command(label="Redo", command=self._current_text_event("edit_redo"), accelerator="Ctrl+Y")
         editmenu.add_separator()
         editmenu.add_command(label="Find", command=self.find_text, accelerator="Ctrl+F")
+        editmenu.add_command(label="Find in Files...", command=self.find_in_files, accelerator="Ctrl+Shift+F")
+        editmenu.add_command(label="Go to Symbol...", command=self.go_to_symbol, accelerator="Ctrl+T")
+        editmenu.add_command(label="Toggle Read-Only", command=self.toggle_readonly)
         editmenu.add_command(label="Close Tab", command=self.close_current_tab, accelerator="Ctrl+W")
         menubar.add_cascade(label="Edit", menu=editmenu)
 
+        viewmenu = tk.Menu(menubar, tearoff=0)
+        viewmenu.add_checkbutton(label="Outline", variable=self.outline_var, command=self.toggle_outline)
+        viewmenu.add_checkbutton(label="Performance Overlay", variable=self.perf_overlay_var,
+                                 command=self.toggle_perf_overlay)
+        viewmenu.add_command(label="Export Performance Trace...", command=self.export_perf_trace)
+        menubar.add_cascade(label="View", menu=viewmenu)
+
         runmenu = tk.Menu(menubar, tearoff=0)
         runmenu.add_command(label="Run", command=self.run_current, accelerator="F5")
+        runmenu.add_command(label="Stop", command=self.stop_current)
+        runmenu.add_command(label="Stop All", command=self.stop_all_runs)
         menubar.add_cascade(label="Run", menu=runmenu)
 
         helpmenu = tk.Menu(menubar, tearoff=0)
+        helpmenu.add_command(label="Show UI Stall Log", command=self.show_stall_log)
         helpmenu.add_command(label="About", command=self.show_about)
         menubar.add_cascade(label="Help", menu=helpmenu)
 
@@ -708,10 +3396,15 @@ class VanillaStudioApp:
     def _bind_shortcuts(self):
         self.root.bind_all("<Control-n>", lambda e: self.new_file())
         self.root.bind_all("<Control-o>", lambda e: self.open_file())
+        self.root.bind_all("<Control-p>", lambda e: self.quick_open())
         self.root.bind_all("<Control-s>", lambda e: self.save_file())
         self.root.bind_all("<Control-S>", lambda e: self.save_file_as())
         self.root.bind_all("<F5>", lambda e: self.run_current())
         self.root.bind_all("<Control-f>", lambda e: self.find_text())
+        self.root.bind_all("<Control-F>", lambda e: self.find_in_files())
+        self.root.bind_all("<Control-t>", lambda e: self.go_to_symbol())
+        self.root.bind_all("<F3>", lambda e: self.search_next())
+        self.root.bind_all("<Shift-F3>", lambda e: self.search_prev())
         self.root.bind_all("<Control-w>", lambda e: self.close_current_tab())
 
     def _current_text_event(self, cmd):
@@ -732,9 +3425,7 @@ class VanillaStudioApp:
         language = self.lang_var.get()
         title = "untitled" + (LANG_EXT.get(language, "") or "")
         tab = EditorTab(self.notebook, self, title=title, filepath=None, language=language)
-        self.tabs.append(tab)
-        self.notebook.add(tab.frame, text=tab.title)
-        self.notebook.select(tab.frame)
+        self._add_tab(tab)
         self.update_status("New file")
 
     def open_file(self, path=None):
@@ -743,35 +3434,145 @@ class VanillaStudioApp:
         if not path:
             return
         path = Path(path)
+        with PROFILER.span("open"):
+            self._open_path(path)
+
+    def _open_path(self, path, language=None):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = f.read()
+            large = path.stat().st_size >= LARGE_FILE_THRESHOLD
+            data = None
+            if not large:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = f.read()
         except Exception as e:
             messagebox.showerror("Open file", f"Unable to open file: {e}")
             return
-        ext = path.suffix.lower().lstrip(".")
-        lang_map = {
-            "py":"python", "c":"c", "cpp":"cpp", "cc":"cpp", "cxx":"cpp",
-            "html":"html", "htm":"html", "css":"css", "js":"javascript",
-            "ts":"typescript", "rs":"rust", "java":"java", "lua":"lua", "go":"go"
-        }
-        language = lang_map.get(ext, "python")
+        language = language or EXT_LANG.get(path.suffix.lower().lstrip("."), "python")
         tab = EditorTab(self.notebook, self, title=path.name, filepath=path, language=language)
+        self._add_tab(tab)
+        if large:
+            self._load_large_file(tab, path)
+            return tab
         tab.text.delete("1.0", "end")
         tab.text.insert("1.0", data)
-        tab.schedule_highlight()
+        tab.text.edit_modified(False)
+        tab._saved_hash = hash(data)
         tab.update_linenumbers()
+        self.update_status(f"Opened {path}")
+        return tab
+
+    def _load_large_file(self, tab, path):
+        """
+        Large-file mode: the file is mmapped and inserted in chunks from after()
+        callbacks, each limited to about one frame of work, so the UI keeps
+        responding. The tab is read-only and not highlighted.
+        """
+        try:
+            f = open(path, "rb")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception as e:
+            messagebox.showerror("Open file", f"Unable to open file: {e}")
+            return
+        tab.large_file = True
+        tab.highlight_enabled = False
+        tab.text.delete("1.0", "end")
+        tab.text.config(undo=False)  # no undo history for the initial load
+        tab.set_readonly(True)
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"),
+                                               translate=True)
+        size = len(mm)
+        pos = [0]
+
+        def finish():
+            mm.close()
+            f.close()
+
+        def step():
+            if self._tab_by_widget.get(str(tab.frame)) is not tab:
+                finish()  # tab closed while loading
+                return
+            deadline = time.perf_counter() + LARGE_FILE_FRAME_BUDGET
+            try:
+                with PROFILER.span("open.chunk"):
+                    tab.text.config(state="normal")
+                    while pos[0] < size and time.perf_counter() < deadline:
+                        end = min(size, pos[0] + LARGE_FILE_CHUNK)
+                        chunk = decoder.decode(mm[pos[0]:end], final=end >= size)
+                        tab.text.insert("end-1c", chunk)
+                        pos[0] = end
+                    tab.text.config(state="disabled" if tab.readonly else "normal")
+            except tk.TclError:
+                finish()
+                return
+            tab.update_linenumbers()
+            if pos[0] < size:
+                self.update_status(f"Loading {path.name}... {pos[0] * 100 // size}%")
+                self.root.after(1, step)
+                return
+            finish()
+            tab.text.edit_reset()
+            tab.text.edit_modified(False)
+            tab.text.config(undo=True)
+            tab.text.mark_set("insert", "1.0")
+            self.update_status(f"Opened {path} (large file: read-only, highlighting off)")
+
+        self.update_status(f"Loading {path.name}... 0%")
+        self.root.after(1, step)
+
+    def toggle_readonly(self):
+        tab = self.get_current_tab()
+        if not tab:
+            return
+        tab.set_readonly(not tab.readonly)
+        self.update_status("Read-only" if tab.readonly else "Editable")
+
+    def get_current_tab(self):
+        return self._tab_by_widget.get(self.notebook.select())
+
+    def _add_tab(self, tab, select=True):
         self.tabs.append(tab)
+        self._tab_by_widget[str(tab.frame)] = tab
+        tab.on_change(lambda start, end, inserted, tab=tab: self._on_buffer_changed(tab))
         self.notebook.add(tab.frame, text=tab.title)
+        if select:
+            self.select_tab(tab)
+
+    def _remove_tab(self, tab):
+        self.notebook.forget(tab.frame)
+        self.tabs = [t for t in self.tabs if t is not tab]
+        self._tab_by_widget.pop(str(tab.frame), None)
+        tab._words.clear()
+        if self._active_tab is tab:
+            self._active_tab = None
+        try:
+            tab.frame.destroy()
+        except Exception:
+            pass
+
+    def select_tab(self, tab):
+        # wake first so callers can move the cursor right after selecting
+        tab.wake()
         self.notebook.select(tab.frame)
-        self.update_status(f"Opened {path}")
 
-    def get_current_tab(self):
-        sel = self.notebook.select()
+    def _on_tab_changed(self, event=None):
+        now = time.monotonic()
+        if self._active_tab is not None:
+            self._active_tab.last_active = now
+        tab = self.get_current_tab()
+        self._active_tab = tab
+        if tab is not None:
+            tab.last_active = now
+            tab.wake()
+        self._refresh_outline_panel()
+
+    def _hibernate_idle_tabs(self):
+        """Periodic: hibernate background tabs not viewed for TAB_HIBERNATE_AFTER seconds."""
+        cutoff = time.monotonic() - TAB_HIBERNATE_AFTER
+        current = self.get_current_tab()
         for tab in self.tabs:
-            if str(tab.frame) == sel:
-                return tab
-        return None
+            if tab is not current and tab.last_active < cutoff:
+                tab.hibernate()
+        self.root.after(60_000, self._hibernate_idle_tabs)
 
     def save_file(self):
         tab = self.get_current_tab()
@@ -779,10 +3580,14 @@ class VanillaStudioApp:
             return
         if not tab.filepath:
             return self.save_file_as()
+        if not tab.dirty and tab.filepath.exists():
+            self.update_status(f"No changes to save in {tab.filepath.name}")
+            return
         try:
-            tab.save()
-            self.update_status(f"Saved {tab.filepath}")
-            self.append_console(f"Saved: {tab.filepath}\n")
+            if tab.save():
+                self.update_status(f"Saving {tab.filepath}...")
+            else:
+                self.update_status(f"No changes to save in {tab.filepath.name}")
         except Exception as e:
             messagebox.showerror("Save", f"Error saving file: {e}")
 
@@ -803,27 +3608,72 @@ class VanillaStudioApp:
                 path = path.with_suffix(expected_ext)
         try:
             tab.save(str(path))
-            self.update_status(f"Saved {path}")
-            self.append_console(f"Saved as: {path}\n")
+            self.update_status(f"Saving {path}...")
         except Exception as e:
             messagebox.showerror("Save As", f"Error saving file: {e}")
 
+    def _watch_saves(self):
+        if self._save_poll_id is None:
+            self._save_poll_id = self.root.after(20, self._poll_saves)
+
+    def _poll_saves(self):
+        """Report finished background saves (Tk thread)."""
+        self._save_poll_id = None
+        # read before draining: a save finishing in between is drained by the next poll
+        pending = get_save_worker().pending
+        try:
+            while True:
+                (tab, digest, autosave, edits), path, error = self._save_results.get_nowait()
+                if error is None:
+                    tab._saved_hash = digest
+                    if tab._edit_count == edits:
+                        try:
+                            tab._set_modified(False)
+                        except tk.TclError:
+                            pass  # tab closed meanwhile
+                    if self.symbol_index is not None:
+                        self.symbol_index.update_paths([path])
+                    self.update_status(f"{'Auto-saved' if autosave else 'Saved'} {path}")
+                    if not autosave:
+                        self.append_console(f"Saved: {path}\n")
+                    continue
+                if autosave:
+                    self.update_status(f"Auto-save of {path.name} failed: {error}")
+                else:
+                    messagebox.showerror("Save", f"Error saving file: {error}")
+        except queue.Empty:
+            pass
+        if pending:
+            self._watch_saves()
+
+    def schedule_autosave(self, tab):
+        """(Re)start the autosave delay for `tab` when File > Auto Save is on."""
+        if not self.autosave_var.get() or not tab.filepath or tab.readonly:
+            return
+        after_id = self._autosave_after.pop(tab, None)
+        if after_id:
+            self.root.after_cancel(after_id)
+        self._autosave_after[tab] = self.root.after(AUTOSAVE_DELAY, lambda: self._autosave(tab))
+
+    def _autosave(self, tab):
+        self._autosave_after.pop(tab, None)
+        if self._tab_by_widget.get(str(tab.frame)) is not tab or not tab.dirty or tab.readonly:
+            return
+        try:
+            tab.save(autosave=True)
+        except Exception as e:
+            self.update_status(f"Auto-save of {tab.title} failed: {e}")
+
     def close_current_tab(self):
         tab = self.get_current_tab()
         if not tab:
             return
-        if not tab.filepath:
+        if not tab.filepath or tab.dirty:
             res = messagebox.askyesno("Close Tab", "This tab is unsaved. Close anyway?")
             if not res:
                 return
         try:
-            idx = self.notebook.index(tab.frame)
-            self.notebook.forget(idx)
-            self.tabs = [t for t in self.tabs if t is not tab]
-            try:
-                tab.frame.destroy()
-            except Exception:
-                pass
+            self._remove_tab(tab)
             self.update_status("Tab closed")
         except Exception:
             pass
@@ -831,8 +3681,9 @@ class VanillaStudioApp:
     # ---------------------------
     # Workspace (file tree)
     # ---------------------------
-    def open_workspace(self):
-        folder = filedialog.askdirectory()
+    def open_workspace(self, folder=None):
+        if not folder:
+            folder = filedialog.askdirectory()
         if not folder:
             return
         self.workspace_path = Path(folder)
@@ -852,29 +3703,82 @@ class VanillaStudioApp:
         # clear previous tree
         for i in self.tree.get_children():
             self.tree.delete(i)
-        # populate tree (limited depth)
+        self._tree_gen += 1
+        patterns = load_ignore_patterns(self.workspace_path)
+        self._tree_ignored = compile_ignore(patterns)
+        if self.symbol_index is not None:
+            self.symbol_index.close()
+            self.symbol_index = None
+        self.file_index = None
+        self.after_first_paint(lambda: self._index_workspace(self.workspace_path, patterns))
+        # list the top level only; folders load when expanded
         self._populate_tree(self.workspace_path, "")
         self.tree.pack(fill="both", expand=True)
         self.ws_label_var.set(f"Workspace: {self.workspace_path.name}")
 
-    def _populate_tree(self, root_path: Path, parent_node, max_depth=3, current_depth=0):
-        """Recursively add files and directories to tree (limited depth)."""
-        if current_depth > max_depth:
-            return
+    def _index_workspace(self, folder, patterns):
+        if folder != self.workspace_path:
+            return  # closed or replaced before the first frame
+        # (re)build the file index off the UI thread; a saved index is refreshed incrementally
+        self.file_index = WorkspaceIndex(folder, patterns)
+        threading.Thread(target=self.file_index.update, daemon=True).start()
+        if self.symbol_index is not None:
+            self.symbol_index.close()
+        self.symbol_index = SymbolIndex(folder, patterns)
+        self.symbol_index.start()
+        self._load_workspace_words()
+
+    def _populate_tree(self, root_path: Path, parent_node):
+        """List one level of root_path on a background thread; children are added by _poll_tree."""
+        gen = self._tree_gen
+        ignored = self._tree_ignored
+
+        def work():
+            try:
+                entries = list_directory(root_path, ignored)
+            except OSError:
+                entries = []
+            self._tree_queue.put((gen, parent_node, entries))
+
+        self._tree_pending += 1
+        threading.Thread(target=work, daemon=True).start()
+        if self._tree_pending == 1:
+            self.root.after(10, self._poll_tree)
+
+    def _poll_tree(self):
         try:
-            entries = sorted(root_path.iterdir(), key=lambda p: (not p.is_dir(), p.name.lower()))
-        except PermissionError:
+            while True:
+                gen, parent_node, entries = self._tree_queue.get_nowait()
+                self._tree_pending -= 1
+                if gen == self._tree_gen:
+                    self._insert_tree_entries(parent_node, entries)
+        except queue.Empty:
+            pass
+        if self._tree_pending > 0:
+            self.root.after(15, self._poll_tree)
+
+    def _insert_tree_entries(self, parent_node, entries):
+        if parent_node and not self.tree.exists(parent_node):
             return
-        for p in entries:
-            node_text = p.name + ("/" if p.is_dir() else "")
-            node_id = self.tree.insert(parent_node, "end", text=node_text, values=(str(p), "dir" if p.is_dir() else "file"))
-            if p.is_dir():
-                # insert a dummy child so folder shows as expandable
-                try:
-                    # populate one level deep for quicker browsing
-                    self._populate_tree(p, node_id, max_depth, current_depth + 1)
-                except Exception:
-                    pass
+        # drop the "loading" placeholder
+        for child in self.tree.get_children(parent_node):
+            if self.tree.set(child, "type") in ("placeholder", "loading"):
+                self.tree.delete(child)
+        for name, full, is_dir in entries:
+            node_id = self.tree.insert(parent_node, "end", text=name + ("/" if is_dir else ""),
+                                       values=(full, "dir" if is_dir else "file"))
+            if is_dir:
+                # placeholder child so the folder shows as expandable
+                self.tree.insert(node_id, "end", text="(loading...)", values=("", "placeholder"))
+
+    def _on_tree_open(self, event=None):
+        item = self.tree.focus()
+        if not item or self.tree.set(item, "type") != "dir":
+            return
+        children = self.tree.get_children(item)
+        if len(children) == 1 and self.tree.set(children[0], "type") == "placeholder":
+            self.tree.set(children[0], "type", "loading")  # listing requested
+            self._populate_tree(Path(self.tree.set(item, "fullpath")), item)
 
     def _on_tree_double_click(self, event):
         item = self.tree.selection()
@@ -888,19 +3792,327 @@ class VanillaStudioApp:
             full = str(self.workspace_path / txt)
         path = Path(full)
         if path.is_dir():
-            # toggle expand/collapse
-            if self.tree.get_children(it):
-                # already expanded -> collapse
-                if self.tree.item(it, "open"):
-                    self.tree.item(it, open=False)
-                else:
-                    self.tree.item(it, open=True)
+            # the Treeview class binding toggles the folder; <<TreeviewOpen>> loads it
+            return
+        self.open_file(str(path))
+
+    def quick_open(self):
+        """Ctrl+P: fuzzy-find a workspace file by name and open it."""
+        index = self.file_index
+        if index is None:
+            self.update_status("Open a workspace to use Quick Open")
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Quick Open")
+        win.transient(self.root)
+        win.geometry("560x360")
+        query_var = tk.StringVar()
+        entry = ttk.Entry(win, textvariable=query_var)
+        entry.pack(fill="x", padx=6, pady=6)
+        listbox = tk.Listbox(win, activestyle="dotbox")
+        listbox.pack(fill="both", expand=True, padx=6)
+        info_var = tk.StringVar()
+        ttk.Label(win, textvariable=info_var, anchor="w").pack(fill="x", padx=6, pady=(2, 6))
+        results = []
+
+        def refresh(event=None):
+            if event is not None and event.keysym in ("Up", "Down", "Return", "Escape"):
+                return
+            if not index.ready:
+                info_var.set("Indexing workspace...")
+                win.after(100, refresh)
+                return
+            results[:] = index.search(query_var.get())
+            listbox.delete(0, "end")
+            if results:
+                listbox.insert("end", *results)
+                listbox.selection_set(0)
+                listbox.activate(0)
+            info_var.set(f"{len(results)} shown of {len(index)} files")
+
+        def move(delta):
+            if not results:
+                return "break"
+            cur = listbox.curselection()
+            i = max(0, min(len(results) - 1, (cur[0] if cur else 0) + delta))
+            listbox.selection_clear(0, "end")
+            listbox.selection_set(i)
+            listbox.activate(i)
+            listbox.see(i)
+            return "break"
+
+        def accept(event=None):
+            cur = listbox.curselection()
+            if not results or not cur:
+                return "break"
+            path = Path(index.root) / results[cur[0]]
+            win.destroy()
+            self.open_file(str(path))
+            return "break"
+
+        entry.bind("<KeyRelease>", refresh)
+        entry.bind("<Down>", lambda e: move(1))
+        entry.bind("<Up>", lambda e: move(-1))
+        entry.bind("<Return>", accept)
+        listbox.bind("<Double-1>", accept)
+        win.bind("<Escape>", lambda e: win.destroy())
+        entry.focus_set()
+        refresh()
+
+    # ---------------------------
+    # Outline and go to symbol
+    # ---------------------------
+    def toggle_outline(self):
+        if self.outline_var.get():
+            self.main_pane.add(self.outline_frame, weight=1)
+            self._outline_shown = None
+            self._refresh_outline_panel()
+        else:
+            self.main_pane.forget(self.outline_frame)
+
+    def _on_outline_changed(self, tab):
+        if tab is self.get_current_tab():
+            self._refresh_outline_panel()
+
+    def _refresh_outline_panel(self):
+        """Show the current tab's symbols; the tree is only rebuilt when names or nesting changed."""
+        if not self.outline_var.get():
+            return
+        tab = self.get_current_tab()
+        symbols = tab.symbols if tab is not None else []
+        key = [(kind, name, indent) for _line, _col, kind, name, indent in symbols]
+        if self._outline_shown is not None and self._outline_shown[0] is tab and self._outline_shown[1] == key:
+            return  # only line numbers moved; items look symbols up by position when activated
+        self._outline_shown = (tab, key)
+        tree = self.outline_tree
+        tree.delete(*tree.get_children())
+        parents = []  # (indent, item) of the enclosing symbols
+        for i, (kind, name, indent) in enumerate(key):
+            while parents and parents[-1][0] >= indent:
+                parents.pop()
+            item = tree.insert(parents[-1][1] if parents else "", "end", iid=str(i), text=name,
+                               values=(kind,), open=True)
+            parents.append((indent, item))
+
+    def _on_outline_activate(self, event=None):
+        item = self.outline_tree.focus()
+        tab = self.get_current_tab()
+        if not item or tab is None or int(item) >= len(tab.symbols):
+            return
+        line, col = tab.symbols[int(item)][:2]
+        index = f"{line}.{col}"
+        tab.text.mark_set("insert", index)
+        tab.text.see(index)
+        tab.text.focus_set()
+
+    def go_to_symbol(self):
+        """Ctrl+T: jump to a symbol of the current tab or, with a workspace open, of any workspace file."""
+        tab = self.get_current_tab()
+        index = self.symbol_index
+        win = tk.Toplevel(self.root)
+        win.title("Go to Symbol")
+        win.transient(self.root)
+        win.geometry("640x380")
+        query_var = tk.StringVar()
+        entry = ttk.Entry(win, textvariable=query_var)
+        entry.pack(fill="x", padx=6, pady=6)
+        listbox = tk.Listbox(win, activestyle="dotbox", font="TkFixedFont")
+        listbox.pack(fill="both", expand=True, padx=6)
+        info_var = tk.StringVar()
+        ttk.Label(win, textvariable=info_var, anchor="w").pack(fill="x", padx=6, pady=(2, 6))
+        results = []  # (path or None for the current tab, line, col)
+        limit = 100
+
+        def refresh(event=None):
+            if event is not None and event.keysym in ("Up", "Down", "Return", "Escape"):
+                return
+            q = query_var.get().strip().lower()
+            results.clear()
+            rows = []
+            current = os.path.abspath(tab.filepath) if tab is not None and tab.filepath else None
+            if tab is not None:
+                for line, col, kind, name, _indent in tab.symbols:
+                    if q in name.lower():
+                        results.append((None, line, col))
+                        rows.append(f"{name}  [{kind}]  :{line}")
+                        if len(results) >= limit:
+                            break
+            if index is not None and q:
+                for name, kind, path, line, col in index.search(q, limit):
+                    if path == current:
+                        continue  # the open buffer is more current than the index
+                    results.append((path, line, col))
+                    rows.append(f"{name}  [{kind}]  {os.path.relpath(path, index.root)}:{line}")
+            listbox.delete(0, "end")
+            if rows:
+                listbox.insert("end", *rows)
+                listbox.selection_set(0)
+                listbox.activate(0)
+            if index is not None and not index.ready:
+                info_var.set(f"{len(results)} shown (indexing workspace...)")
+                win.after(250, refresh)
+            else:
+                info_var.set(f"{len(results)} shown")
+
+        def move(delta):
+            if not results:
+                return "break"
+            cur = listbox.curselection()
+            i = max(0, min(len(results) - 1, (cur[0] if cur else 0) + delta))
+            listbox.selection_clear(0, "end")
+            listbox.selection_set(i)
+            listbox.activate(i)
+            listbox.see(i)
+            return "break"
+
+        def accept(event=None):
+            cur = listbox.curselection()
+            if not results or not cur:
+                return "break"
+            path, line, col = results[cur[0]]
+            win.destroy()
+            if path is None:
+                self.select_tab(tab)
+                tab.text.mark_set("insert", f"{line}.{col}")
+                tab.text.see(f"{line}.{col}")
+                tab.text.focus_set()
             else:
-                # populate children
-                self._populate_tree(path, it)
-                self.tree.item(it, open=True)
+                self.open_location(path, line, col)
+            return "break"
+
+        entry.bind("<KeyRelease>", refresh)
+        entry.bind("<Down>", lambda e: move(1))
+        entry.bind("<Up>", lambda e: move(-1))
+        entry.bind("<Return>", accept)
+        listbox.bind("<Double-1>", accept)
+        win.bind("<Escape>", lambda e: win.destroy())
+        entry.focus_set()
+        refresh()
+
+    # ---------------------------
+    # Word completion
+    # ---------------------------
+    def _load_workspace_words(self):
+        if self._workspace_words_stop is not None:
+            self._workspace_words_stop.set()
+        self.workspace_words = None
+        stop = self._workspace_words_stop = threading.Event()
+        root, ignored = self.workspace_path, self._tree_ignored
+
+        def work():
+            trie = build_workspace_words(root, ignored, stop)
+            if not stop.is_set():
+                self.workspace_words = trie
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def complete_word(self, prefix, limit=8):
+        """Most frequent identifiers starting with `prefix` in the open tabs and the workspace files."""
+        counts = {}
+        for trie in (self.words, self.workspace_words):
+            if trie is not None:
+                for word, n in trie.complete(prefix, limit + 1):
+                    counts[word] = counts.get(word, 0) + n
+        counts.pop(prefix, None)  # already typed out
+        return sorted(counts, key=lambda w: (-counts[w], w))[:limit]
+
+    # ---------------------------
+    # Session (open tabs and workspace survive restarts)
+    # ---------------------------
+    def save_session(self):
+        state = {
+            "version": 1,
+            "autosave": self.autosave_var.get(),
+            "workspace": str(self.workspace_path) if self.workspace_path else None,
+            "tabs": [],
+            "selected": None,
+        }
+        current = self.get_current_tab()
+        for tab in self.tabs:
+            if not tab.filepath:
+                continue  # untitled buffers are not restored
+            if tab is current:
+                state["selected"] = len(state["tabs"])
+            state["tabs"].append(tab.session_state())
+        path = session_path()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(state, indent=1), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def restore_session(self):
+        """
+        Reopen the last session's workspace and tabs. Only the selected tab is
+        loaded and highlighted now; the others stay empty until first selected.
+        Returns False when there is nothing to restore.
+        """
+        try:
+            state = json.loads(session_path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if not isinstance(state, dict) or state.get("version") != 1:
+            return False
+        self.autosave_var.set(bool(state.get("autosave")))
+        workspace = state.get("workspace")
+        if workspace and Path(workspace).is_dir():
+            self.open_workspace(workspace)
+        restored = []
+        for entry in state.get("tabs", []):
+            path = Path(entry.get("path", ""))
+            if not path.is_file():
+                restored.append(None)
+                continue
+            tab = EditorTab(self.notebook, self, title=path.name, filepath=path,
+                            language=entry.get("language") or "python")
+            tab.defer_load(entry.get("insert", "1.0"), entry.get("top", 0.0))
+            self._add_tab(tab, select=False)
+            if entry.get("readonly"):
+                tab.set_readonly(True)
+            restored.append(tab)
+        tabs = [t for t in restored if t is not None]
+        if not tabs:
+            return False
+        selected = state.get("selected")
+        if isinstance(selected, int) and 0 <= selected < len(restored) and restored[selected]:
+            tab = restored[selected]
         else:
-            self.open_file(str(path))
+            tab = tabs[0]
+        self.select_tab(tab)
+        self.update_status(f"Restored {len(tabs)} tab(s) from the last session")
+        return True
+
+    def after_first_paint(self, callback):
+        """Run callback once the first frame is on screen (right away if it already is)."""
+        if self.painted:
+            callback()
+        else:
+            self._after_paint.append(callback)
+
+    def _on_first_paint(self):
+        self.painted = True
+        callbacks, self._after_paint = self._after_paint, []
+        for callback in callbacks:
+            try:
+                callback()
+            except tk.TclError:
+                pass  # its tab was closed meanwhile
+        self._preload()
+
+    def _preload(self):
+        languages = {tab.language for tab in self.tabs}
+        threading.Thread(target=preload_modules, args=(languages,), daemon=True).start()
+
+    def quit_app(self):
+        # let saves still being written finish before the process exits
+        get_save_worker().flush(timeout=10)
+        self.save_session()
+        self.watchdog.stop()
+        if self.symbol_index is not None:
+            self.symbol_index.close()
+        self.root.destroy()
 
     def close_workspace(self):
         if self.workspace_path is None:
@@ -914,6 +4126,14 @@ class VanillaStudioApp:
             except Exception:
                 pass
         self.workspace_path = None
+        self.file_index = None
+        if self.symbol_index is not None:
+            self.symbol_index.close()
+            self.symbol_index = None
+        if self._workspace_words_stop is not None:
+            self._workspace_words_stop.set()
+        self.workspace_words = None
+        self._tree_gen += 1
         self.tree.pack_forget()
         self.ws_label_var.set("Workspace: (none)")
 
@@ -934,195 +4154,565 @@ class VanillaStudioApp:
         if not tab.filepath:
             return
         lang = tab.language
-        self.append_console(f"Running {tab.title} ({lang})...\n")
-        self.update_status("Running...")
-        self._stop_event.clear()
+        # the run keeps the path it started with, even if the tab is renamed or closed meanwhile
+        filepath = tab.filepath
+        timeout = run_timeout(lang)
 
-        def runner():
-            try:
-                if lang == "python":
-                    cmd = [sys.executable, str(tab.filepath)]
-                    code, out, err = safe_run_subprocess(cmd, cwd=str(tab.filepath.parent))
-                    if out:
-                        self.append_console(out)
-                    if err:
-                        self.append_console(err)
-                elif lang in ("c", "cpp", "c++"):
-                    compiler = "gcc" if lang == "c" else "g++"
-                    if not which(compiler):
-                        self.append_console(f"Compiler '{compiler}' not found in PATH.\n")
+        def runner(job):
+            job.write(f"Running {filepath.name} ({lang})...\n")
+            get_save_worker().flush(timeout=30)  # run what was last saved, not a half-written file
+            with PROFILER.span("run"):
+                return run_language(job)
+
+        def run_language(job):
+            import webbrowser
+            code = None
+
+            def run(cmd, cwd=None):
+                if job.stop_event.is_set():
+                    return -1  # stopped between steps (e.g. after compiling)
+                with PROFILER.span("run.exec"):
+                    return stream_subprocess(cmd, cwd=cwd, on_output=job.emit, timeout=timeout,
+                                             stop_event=job.stop_event)
+
+            def build(cmd, compiler, name, version_flag="--version"):
+                # skip the compiler when this exact source/command/toolchain was built before
+                with PROFILER.span("run.build"):
+                    version = toolchain_version(compiler, version_flag, stop_event=job.stop_event)
+                    return cached_compile(filepath, cmd, version, name, run,
+                                          cwd=str(filepath.parent), on_output=job.emit)
+
+            if lang == "python":
+                # -u: unbuffered, so prints reach the console as they happen
+                cmd = [sys.executable, "-u", str(filepath)]
+                code = run(cmd, cwd=str(filepath.parent))
+            elif lang in ("c", "cpp", "c++"):
+                compiler = "gcc" if lang == "c" else "g++"
+                if not which(compiler):
+                    job.write(f"Compiler '{compiler}' not found in PATH.\n")
+                    return
+                cmd = [compiler, str(filepath), "-o", BuildCache.OUT]
+                exe_path = build(cmd, compiler, filepath.with_suffix(".out").name)
+                if exe_path is None:
+                    return
+                code = run([str(exe_path)], cwd=str(filepath.parent))
+            elif lang == "rust":
+                # try rustc
+                if which("rustc"):
+                    cmd = ["rustc", str(filepath), "-o", BuildCache.OUT]
+                    exe = build(cmd, "rustc", filepath.with_suffix(".out").name)
+                    if exe is None:
                         return
-                    exe_path = tab.filepath.with_suffix(".out")
-                    cmd = [compiler, str(tab.filepath), "-o", str(exe_path)]
-                    code, out, err = safe_run_subprocess(cmd, cwd=str(tab.filepath.parent))
+                    code = run([str(exe)], cwd=str(filepath.parent))
+                else:
+                    job.write("rustc not found in PATH.\n")
+            elif lang == "go":
+                if which("go"):
+                    cmd = ["go", "run", str(filepath)]
+                    code = run(cmd, cwd=str(filepath.parent))
+                else:
+                    job.write("go not found in PATH.\n")
+            elif lang == "java":
+                if which("javac") and which("java"):
+                    classdir = filepath.parent
+                    code = run(["javac", str(filepath)], cwd=str(classdir))
                     if code != 0:
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
+                        return code
+                    # find classname (use filename)
+                    classname = filepath.stem
+                    code = run(["java", classname], cwd=str(classdir))
+                else:
+                    job.write("javac/java not found in PATH.\n")
+            elif lang in ("javascript", "js"):
+                if which("node"):
+                    code = run(["node", str(filepath)], cwd=str(filepath.parent))
+                else:
+                    webbrowser.open(str(filepath.resolve().as_uri()))
+                    job.write("Node not found — opened file in browser instead.\n")
+            elif lang in ("typescript", "ts"):
+                # tsc -> compile to js then node
+                if which("tsc"):
+                    cmd = ["tsc", str(filepath), "--outFile", BuildCache.OUT]
+                    js_out = build(cmd, "tsc", filepath.with_suffix(".js").name)
+                    if js_out is None:
                         return
-                    code, out, err = safe_run_subprocess([str(exe_path)], cwd=str(tab.filepath.parent))
-                    if out: self.append_console(out)
-                    if err: self.append_console(err)
-                elif lang == "rust":
-                    # try rustc
-                    if which("rustc"):
-                        exe = tab.filepath.with_suffix("")
-                        exe = exe.with_suffix(".out")
-                        cmd = ["rustc", str(tab.filepath), "-o", str(exe)]
-                        code, out, err = safe_run_subprocess(cmd, cwd=str(tab.filepath.parent))
-                        if code != 0:
-                            if out: self.append_console(out)
-                            if err: self.append_console(err)
-                            return
-                        code, out, err = safe_run_subprocess([str(exe)], cwd=str(tab.filepath.parent))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
-                    else:
-                        self.append_console("rustc not found in PATH.\n")
-                elif lang == "go":
-                    if which("go"):
-                        cmd = ["go", "run", str(tab.filepath)]
-                        code, out, err = safe_run_subprocess(cmd, cwd=str(tab.filepath.parent))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
-                    else:
-                        self.append_console("go not found in PATH.\n")
-                elif lang == "java":
-                    if which("javac") and which("java"):
-                        classdir = tab.filepath.parent
-                        code, out, err = safe_run_subprocess(["javac", str(tab.filepath)], cwd=str(classdir))
-                        if code != 0:
-                            if out: self.append_console(out)
-                            if err: self.append_console(err)
-                            return
-                        # find classname (use filename)
-                        classname = tab.filepath.stem
-                        code, out, err = safe_run_subprocess(["java", classname], cwd=str(classdir))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
-                    else:
-                        self.append_console("javac/java not found in PATH.\n")
-                elif lang in ("javascript", "js"):
                     if which("node"):
-                        code, out, err = safe_run_subprocess(["node", str(tab.filepath)], cwd=str(tab.filepath.parent))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
-                    else:
-                        webbrowser.open(str(tab.filepath.resolve().as_uri()))
-                        self.append_console("Node not found — opened file in browser instead.\n")
-                elif lang in ("typescript", "ts"):
-                    # tsc -> compile to js then node
-                    if which("tsc"):
-                        js_out = tab.filepath.with_suffix(".js")
-                        code, out, err = safe_run_subprocess(["tsc", str(tab.filepath), "--outFile", str(js_out)], cwd=str(tab.filepath.parent))
-                        if code != 0:
-                            if out: self.append_console(out)
-                            if err: self.append_console(err)
-                            return
-                        if which("node"):
-                            code, out, err = safe_run_subprocess(["node", str(js_out)], cwd=str(tab.filepath.parent))
-                            if out: self.append_console(out)
-                            if err: self.append_console(err)
-                        else:
-                            webbrowser.open(str(js_out.resolve().as_uri()))
-                            self.append_console("Node not found — opened compiled JS in browser.\n")
+                        code = run(["node", str(js_out)], cwd=str(filepath.parent))
                     else:
-                        self.append_console("tsc (TypeScript compiler) not found in PATH.\n")
-                elif lang == "lua":
-                    if which("lua"):
-                        code, out, err = safe_run_subprocess(["lua", str(tab.filepath)], cwd=str(tab.filepath.parent))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
-                    else:
-                        self.append_console("lua not found in PATH.\n")
-                elif lang in ("html", "htm", "css"):
-                    webbrowser.open(str(tab.filepath.resolve().as_uri()))
-                    self.append_console(f"Opened {tab.filepath} in default browser.\n")
-                elif lang == "csharp":
-                    if which("dotnet"):
-                        # Create temporary project if needed
-                        proj_dir = tab.filepath.parent
-                        if not (proj_dir / "project.csproj").exists():
-                            code, out, err = safe_run_subprocess(["dotnet", "new", "console", "-o", "."], cwd=str(proj_dir))
-                        code, out, err = safe_run_subprocess(["dotnet", "run"], cwd=str(proj_dir))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
-                    else:
-                        self.append_console(".NET SDK not found in PATH.\n")
-                elif lang == "ruby":
-                    if which("ruby"):
-                        code, out, err = safe_run_subprocess(["ruby", str(tab.filepath)], cwd=str(tab.filepath.parent))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
-                    else:
-                        self.append_console("Ruby not found in PATH.\n")
-                elif lang == "kotlin":
-                    if which("kotlinc"):
-                        # Compile and run using kotlinc
-                        code, out, err = safe_run_subprocess(["kotlinc", str(tab.filepath), "-include-runtime", "-d", "out.jar"], 
-                                                           cwd=str(tab.filepath.parent))
+                        webbrowser.open(str(js_out.resolve().as_uri()))
+                        job.write("Node not found — opened compiled JS in browser.\n")
+                else:
+                    job.write("tsc (TypeScript compiler) not found in PATH.\n")
+            elif lang == "lua":
+                if which("lua"):
+                    code = run(["lua", str(filepath)], cwd=str(filepath.parent))
+                else:
+                    job.write("lua not found in PATH.\n")
+            elif lang in ("html", "htm", "css"):
+                webbrowser.open(str(filepath.resolve().as_uri()))
+                job.write(f"Opened {filepath} in default browser.\n")
+            elif lang == "csharp":
+                if which("dotnet"):
+                    # Create temporary project if needed
+                    proj_dir = filepath.parent
+                    if not (proj_dir / "project.csproj").exists():
+                        code = run(["dotnet", "new", "console", "-o", "."], cwd=str(proj_dir))
                         if code != 0:
-                            if out: self.append_console(out)
-                            if err: self.append_console(err)
-                            return
-                        code, out, err = safe_run_subprocess(["java", "-jar", "out.jar"], cwd=str(tab.filepath.parent))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
-                    else:
-                        self.append_console("Kotlin compiler not found in PATH.\n")
-                elif lang == "nix":
-                    if which("nix"):
-                        if tab.filepath.name == "flake.nix":
-                            code, out, err = safe_run_subprocess(["nix", "develop", "."], cwd=str(tab.filepath.parent))
-                        else:
-                            code, out, err = safe_run_subprocess(["nix-shell", str(tab.filepath)], cwd=str(tab.filepath.parent))
-                        if out: self.append_console(out)
-                        if err: self.append_console(err)
+                            return code
+                    code = run(["dotnet", "run"], cwd=str(proj_dir))
+                else:
+                    job.write(".NET SDK not found in PATH.\n")
+            elif lang == "ruby":
+                if which("ruby"):
+                    code = run(["ruby", str(filepath)], cwd=str(filepath.parent))
+                else:
+                    job.write("Ruby not found in PATH.\n")
+            elif lang == "kotlin":
+                if which("kotlinc"):
+                    # Compile and run using kotlinc
+                    cmd = ["kotlinc", str(filepath), "-include-runtime", "-d", BuildCache.OUT]
+                    jar = build(cmd, "kotlinc", "out.jar", version_flag="-version")
+                    if jar is None:
+                        return
+                    code = run(["java", "-jar", str(jar)], cwd=str(filepath.parent))
+                else:
+                    job.write("Kotlin compiler not found in PATH.\n")
+            elif lang == "nix":
+                if which("nix"):
+                    if filepath.name == "flake.nix":
+                        code = run(["nix", "develop", "."], cwd=str(filepath.parent))
                     else:
-                        self.append_console("Nix not found in PATH.\n")
+                        code = run(["nix-shell", str(filepath)], cwd=str(filepath.parent))
                 else:
-                    self.append_console("Unknown language: cannot run.\n")
-            except Exception as e:
-                self.append_console(f"Error: {e}\n")
-            finally:
-                self.update_status("Ready")
+                    job.write("Nix not found in PATH.\n")
+            else:
+                job.write("Unknown language: cannot run.\n")
+            return code
+
+        job = self.runs.start(filepath.name, runner)
+        self._open_run_pane(job)
+        self._poll_console()
 
-        self._run_thread = threading.Thread(target=runner, daemon=True)
-        self._run_thread.start()
+    def _selected_run(self):
+        """The run whose console page is selected, if any."""
+        selected = self.console_notebook.select()
+        for job, (page, _text, _var) in self._run_panes.items():
+            if str(page) == selected:
+                return job
+        return None
 
     def stop_current(self):
-        self._stop_event.set()
-        self.append_console("Stop requested (best-effort). If an external process started, stop it manually.\n")
-        self.update_status("Stopped")
+        """Stop the run whose console page is selected, else the most recently started live run."""
+        job = self._selected_run()
+        if job is None or job.done:
+            live = [j for j in self._run_panes if not j.done]
+            if not live:
+                return
+            job = live[-1]
+        self.stop_run(job)
+
+    def stop_run(self, job):
+        if job.done:
+            return
+        # the runner's stream_subprocess sees the event and kills the process group
+        job.write("Stop requested: terminating the running program...\n", "stderr")
+        self.runs.stop(job)
+        self._poll_console()
+
+    def stop_all_runs(self):
+        for job in list(self._run_panes):
+            if not job.done:
+                self.runs.stop(job)
+        self._poll_console()
+
+    def _open_run_pane(self, job):
+        page = ttk.Frame(self.console_notebook)
+        header = ttk.Frame(page)
+        header.pack(side="top", fill="x")
+        header_var = tk.StringVar()
+        ttk.Label(header, textvariable=header_var).pack(side="left", padx=4)
+        ttk.Button(header, text="✕", width=3, command=lambda: self.close_run_pane(job)).pack(side="right", padx=2)
+        ttk.Button(header, text="Stop ⛔", command=lambda: self.stop_run(job)).pack(side="right", padx=2)
+        text = ScrolledText(page, height=8, state="disabled")
+        text.tag_configure("stderr", foreground="#cc3333")
+        text.pack(fill="both", expand=True)
+        self._run_panes[job] = (page, text, header_var)
+        self.console_notebook.add(page, text=job.title)
+        self.console_notebook.select(page)
+        # bound the console: drop the oldest finished pages beyond RUN_PANES_KEEP
+        finished = [j for j in self._run_panes if j.done]
+        for old in finished[:max(0, len(finished) - RUN_PANES_KEEP)]:
+            self.close_run_pane(old)
+
+    def close_run_pane(self, job):
+        if not job.done:
+            self.runs.stop(job)  # its thread finishes on its own; the output is discarded
+        page, _text, _var = self._run_panes.pop(job)
+        self.console_notebook.forget(page)
+        page.destroy()
 
     # ---------------------------
     # UI helpers
     # ---------------------------
-    def append_console(self, text):
+    def append_console(self, text, tag=None):
+        # Tk is not thread-safe: output from worker threads is queued and drained by _poll_console
+        if threading.current_thread() is not threading.main_thread():
+            self._console_queue.put((text, tag))
+            return
         self.console.config(state="normal")
-        self.console.insert("end", text)
+        self.console.insert("end", text, tag)
         self.console.see("end")
         self.console.config(state="disabled")
 
+    def _poll_console(self):
+        """Drain queued output into the console and the run pages; runs on the Tk thread."""
+        if self._console_poll_id is not None:
+            self.root.after_cancel(self._console_poll_id)
+            self._console_poll_id = None
+        self._drain_output(self.console, self._console_queue)
+        live = False
+        for job, (page, text, header_var) in self._run_panes.items():
+            self._drain_output(text, job.output)
+            state = job.describe()
+            if header_var.get() != state:
+                header_var.set(state)
+                self.console_notebook.tab(page, text=f"{job.title} ({state})")
+            live = live or not job.done
+        running, queued = self.runs.counts
+        status = (f"Running: {running}" + (f", queued: {queued}" if queued else "")) if running or queued else "Ready"
+        if status != self._run_status:
+            self._run_status = status
+            self.update_status(status)
+        if live:
+            self._console_poll_id = self.root.after(30, self._poll_console)
+        elif not self._console_queue.empty():
+            self._console_poll_id = self.root.after(0, self._poll_console)
+
+    def _drain_output(self, widget, chunks_queue):
+        chunks = []
+        try:
+            while True:
+                chunks.append(chunks_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if chunks:
+            # one insert call for the whole batch: "insert end text tag text tag ..."
+            args = []
+            for text, tag in chunks:
+                args.extend((text, tag or ""))
+            widget.config(state="normal")
+            widget.tk.call(widget._w, "insert", "end", *args)
+            widget.see("end")
+            widget.config(state="disabled")
+
     def update_status(self, text):
         self.status_var.set(text)
 
+    # ---------------------------
+    # Performance overlay
+    # ---------------------------
+    PERF_PHASES = ("lex", "tag", "highlight.basic", "gutter", "open", "save", "run.build", "run.exec")
+
+    def toggle_perf_overlay(self):
+        """Show/hide the last/p95 timing readout; showing it also turns the profiler on."""
+        if self.perf_overlay_var.get():
+            PROFILER.enabled = True
+            self.perf_label.pack(side="bottom", fill="x", after=self.status_label)
+            self._refresh_perf_overlay()
+        else:
+            PROFILER.enabled = False
+            self.perf_label.pack_forget()
+            if self._perf_after_id:
+                self.root.after_cancel(self._perf_after_id)
+                self._perf_after_id = None
+
+    def _refresh_perf_overlay(self):
+        stats, counters = PROFILER.stats()
+        parts = []
+        for name in self.PERF_PHASES:
+            if name in stats:
+                last, p95, _n = stats[name]
+                parts.append(f"{name} {last * 1000:.1f}/{p95 * 1000:.1f}")
+        for name, value in sorted(counters.items()):
+            parts.append(f"{name}={value}")
+        self.perf_var.set("ms last/p95  " + ("   ".join(parts) if parts else "(no samples yet)"))
+        self._perf_after_id = self.root.after(500, self._refresh_perf_overlay)
+
+    def export_perf_trace(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", initialfile="vanilla-trace.json",
+                                            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            n = PROFILER.export_chrome_trace(path)
+        except Exception as e:
+            messagebox.showerror("Export Trace", f"Unable to write trace: {e}")
+            return
+        self.update_status(f"Wrote {n} trace events to {path}")
+        if not n:
+            self.append_console("Trace is empty: turn on View > Performance Overlay (or set VANILLA_PROFILE=1) to record.\n")
+
     def find_text(self):
+        """Ctrl+F: show the incremental search bar (prefilled with the selection)."""
         tab = self.get_current_tab()
         if not tab:
             return
-        needle = simpledialog.askstring("Find", "Text to find:")
-        if not needle:
+        try:
+            selected = tab.text.get("sel.first", "sel.last")
+            if selected and "\n" not in selected:
+                self.search_var.set(selected)
+        except tk.TclError:
+            pass
+        self.search_bar.pack(side="bottom", fill="x", after=self.console_frame)
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, "end")
+        self._search_refresh()
+
+    def hide_search(self):
+        self.search_bar.pack_forget()
+        tab = self._search[0] if self._search else None
+        self._search = None
+        self._search_current = None
+        if tab is not None:
+            try:
+                tab.text.tag_remove("search", "1.0", "end")
+                tab.text.tag_remove("search_current", "1.0", "end")
+                tab.text.focus_set()
+            except tk.TclError:
+                pass
+
+    def _on_search_key(self, event=None):
+        if event is not None and event.keysym in ("Return", "Escape", "Shift_L", "Shift_R"):
+            return
+        # debounce: re-search once typing pauses briefly
+        if self._search_after_id:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(60, self._search_refresh)
+
+    def _search_state(self):
+        """Current search for the selected tab, recomputed if the pattern or the buffer changed."""
+        tab = self.get_current_tab()
+        pattern = self.search_var.get()
+        if not tab or not pattern:
+            return None
+        key = (pattern, self.search_regex_var.get(), self.search_case_var.get())
+        if self._search and self._search[0] is tab and self._search[1] == tab._edit_count \
+                and self._search[2] == key:
+            return self._search[3]
+        self._search_refresh(select=False)  # the caller picks the match
+        return self._search[3] if self._search else None
+
+    def _on_buffer_changed(self, tab):
+        # keep the search bar's matches current while the searched buffer is edited
+        if self._search is None or self._search[0] is not tab or not self.search_bar.winfo_ismapped():
+            return
+        if self._search_after_id:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(150, lambda: self._search_refresh(select=False))
+
+    def _search_refresh(self, select=True):
+        self._search_after_id = None
+        old_tab = self._search[0] if self._search else None
+        self._search = None
+        self._search_current = None
+        if old_tab is not None:
+            try:
+                old_tab.text.tag_remove("search", "1.0", "end")
+                old_tab.text.tag_remove("search_current", "1.0", "end")
+            except tk.TclError:
+                pass
+        tab = self.get_current_tab()
+        pattern = self.search_var.get()
+        if not tab or not pattern:
+            self.search_count_var.set("")
+            return
+        key = (pattern, self.search_regex_var.get(), self.search_case_var.get())
+        try:
+            engine = BufferSearch(tab.get_content(), pattern, key[1], not key[2])
+        except re.error as e:
+            self.search_count_var.set(f"Invalid regex: {e}")
+            return
+        self._search = (tab, tab._edit_count, key, engine)
+        # all matches in one batched "tag add"
+        tab._apply_tags({"search": engine.ranges()})
+        if not len(engine):
+            self.search_count_var.set("No matches")
             return
-        start = tab.text.search(needle, "1.0", stopindex="end")
-        if not start:
-            messagebox.showinfo("Find", "Not found.")
+        if not select:
+            total = f"{len(engine)}+" if len(engine) >= BufferSearch.MAX_MATCHES else str(len(engine))
+            self.search_count_var.set(f"{total} matches")
             return
-        tab.text.tag_remove("search", "1.0", "end")
-        tab.text.tag_configure("search", background="#444400")
-        end = f"{start}+{len(needle)}c"
-        tab.text.tag_add("search", start, end)
+        self._search_select(tab, engine, engine.next(engine.offset(tab.text.index("insert"))))
+
+    def _search_select(self, tab, engine, i):
+        start, end = engine.span(i)
+        tab.text.tag_remove("search_current", "1.0", "end")
+        tab.text.tag_add("search_current", start, end)
         tab.text.mark_set("insert", end)
         tab.text.see(start)
+        self._search_current = (i, tab.text.index("insert"))
+        total = f"{len(engine)}+" if len(engine) >= BufferSearch.MAX_MATCHES else str(len(engine))
+        self.search_count_var.set(f"{i + 1} of {total}")
+
+    def _search_step(self, forward):
+        engine = self._search_state()
+        if engine is None or not len(engine):
+            return "break"
+        tab = self._search[0]
+        insert = tab.text.index("insert")
+        if self._search_current and self._search_current[1] == insert:
+            # cursor still on the selected match: step from it
+            i = (self._search_current[0] + (1 if forward else -1)) % len(engine)
+        else:
+            pos = engine.offset(insert)
+            i = engine.next(pos) if forward else engine.prev(pos)
+        self._search_select(tab, engine, i)
+        return "break"
+
+    def search_next(self):
+        return self._search_step(True)
+
+    def search_prev(self):
+        return self._search_step(False)
+
+    def find_in_files(self):
+        """Ctrl+Shift+F: search every workspace file; hits stream into the results list."""
+        if self.workspace_path is None:
+            self.update_status("Open a workspace to use Find in Files")
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Find in Files")
+        win.geometry("820x420")
+        top = ttk.Frame(win)
+        top.pack(fill="x", padx=6, pady=6)
+        query_var = tk.StringVar()
+        regex_var = tk.BooleanVar(value=False)
+        case_var = tk.BooleanVar(value=False)
+        entry = ttk.Entry(top, textvariable=query_var)
+        entry.pack(side="left", fill="x", expand=True)
+        ttk.Checkbutton(top, text="Regex", variable=regex_var).pack(side="left", padx=4)
+        ttk.Checkbutton(top, text="Match case", variable=case_var).pack(side="left", padx=4)
+        search_btn = ttk.Button(top, text="Search")
+        search_btn.pack(side="left", padx=4)
+        results = ttk.Treeview(win, columns=("line", "text", "path", "col"), displaycolumns=("line", "text"))
+        results.heading("#0", text="File", anchor="w")
+        results.heading("line", text="Line", anchor="w")
+        results.heading("text", text="Text", anchor="w")
+        results.column("#0", width=260)
+        results.column("line", width=60, stretch=False)
+        results.pack(fill="both", expand=True, padx=6)
+        info_var = tk.StringVar(value="")
+        ttk.Label(win, textvariable=info_var, anchor="w").pack(fill="x", padx=6, pady=(2, 6))
+        state = {"search": None, "count": 0, "errors": 0}
+        root = self.workspace_path
+        max_rows = 5000  # keep the Treeview responsive; the count keeps going
+
+        def poll(search):
+            if state["search"] is not search:
+                return
+            batches = []
+            errors = []
+            try:
+                while True:
+                    batches.append(search.results.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                while True:
+                    errors.append(search.errors.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                for n, error in errors:
+                    state["errors"] += 1
+                    lost = "Search stopped" if n is None else f"{n} files not searched"
+                    results.insert("", "end", text="Error", values=("", f"{lost}: {error!r}", "", ""))
+                    self.update_status(f"Find in Files: {lost}: {error!r}")
+                for matches in batches:
+                    for path, line, col, text in matches:
+                        state["count"] += 1
+                        if state["count"] > max_rows:
+                            continue
+                        try:
+                            rel = os.path.relpath(path, root)
+                        except ValueError:
+                            rel = path
+                        results.insert("", "end", text=rel, values=(line, text.strip(), path, col))
+                finished = search.done.is_set() and search.results.empty() and search.errors.empty()
+                info_var.set(f"{state['count']} matches in {search.files_scanned} files"
+                             + ("" if finished else " (searching...)")
+                             + (f" - {state['errors']} errors" if state["errors"] else "")
+                             + (f" - showing first {max_rows}" if state["count"] > max_rows else ""))
+            except tk.TclError:
+                search.cancel()  # window closed
+                return
+            if not finished:
+                win.after(30, lambda: poll(search))
+
+        def start(event=None):
+            if state["search"] is not None:
+                state["search"].cancel()
+            pattern = query_var.get()
+            if not pattern:
+                return "break"
+            results.delete(*results.get_children())
+            state["count"] = state["errors"] = 0
+            try:
+                search = FileSearch(root, pattern, regex_var.get(), not case_var.get(),
+                                    ignored=self._tree_ignored)
+            except re.error as e:
+                info_var.set(f"Invalid regex: {e}")
+                return "break"
+            state["search"] = search
+            info_var.set("Searching...")
+            poll(search)
+            return "break"
+
+        def open_hit(event=None):
+            item = results.focus()
+            if not item:
+                return
+            line, _text, path, col = results.item(item, "values")
+            if path:  # not an error row
+                self.open_location(path, int(line), int(col))
+
+        def close():
+            if state["search"] is not None:
+                state["search"].cancel()
+            win.destroy()
+
+        search_btn.config(command=start)
+        entry.bind("<Return>", start)
+        results.bind("<Double-1>", open_hit)
+        results.bind("<Return>", open_hit)
+        win.bind("<Escape>", lambda e: close())
+        win.protocol("WM_DELETE_WINDOW", close)
+        entry.focus_set()
+
+    def open_location(self, path, line, col=0):
+        """Open (or switch to) `path` and put the cursor at line.col."""
+        path = Path(path)
+        tab = next((t for t in self.tabs if t.filepath and t.filepath.resolve() == path.resolve()), None)
+        if tab is None:
+            self.open_file(str(path))
+            tab = self.get_current_tab()
+            if tab is None or tab.filepath != path:
+                return
+        else:
+            self.select_tab(tab)
+        index = f"{line}.{col}"
+        tab.text.mark_set("insert", index)
+        tab.text.see(index)
+        tab.text.focus_set()
+
+    def show_stall_log(self):
+        path = self.watchdog.log_path
+        if not path.exists():
+            messagebox.showinfo("UI Stall Log", f"No UI stalls over {self.watchdog.threshold * 1000:.0f} ms recorded yet.\n({path})")
+            return
+        tab = self._open_path(path, language="text")
+        if tab is not None:
+            tab.set_readonly(True)
 
     def show_about(self):
         messagebox.showinfo("About Vanilla Studio", "Vanilla Studio IDE 2.1\nA beginner-friendly IDE\nSupports: Python, C, C++, HTML, CSS, JavaScript, TypeScript, Rust, Java, Lua, Go, Ruby, Kotlin and Nix\nCreated with ♥ by Camila Rose")
@@ -1136,4 +4726,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # find-in-files worker processes in frozen builds
     main()
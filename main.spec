@@ -6,7 +6,13 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # lexers are imported by name at runtime (see _LEXER_CLASSES in main.py)
+    hiddenimports=[
+        'pygments.lexers.python', 'pygments.lexers.c_cpp', 'pygments.lexers.html',
+        'pygments.lexers.css', 'pygments.lexers.javascript', 'pygments.lexers.rust',
+        'pygments.lexers.jvm', 'pygments.lexers.scripting', 'pygments.lexers.go',
+        'pygments.lexers.dotnet', 'pygments.lexers.ruby', 'pygments.lexers.nix',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],